@@ -0,0 +1,151 @@
+"""
+Webpage text extraction benchmark.
+
+Times every installed HTML extractor backend (selectolax, lxml, bs4) against
+the original ScreenModel extraction path (BeautifulSoup html.parser, only
+scripts and styles removed) on saved HTML fixtures. Each fixture is also
+measured with its content repeated --scale times to approximate large pages;
+fixtures mark the repeated part with <!-- bench:repeat --> comments, otherwise
+the whole body is repeated.
+
+Every extractor's output is also checked: it must not be empty and must
+contain each phrase a fixture lists in <!-- bench:expect ... --> comments.
+The script exits with status 1 if any check fails.
+
+Usage:
+    python benchmarks/bench_html_extract.py [--runs 20] [--scale 50] [--fixtures DIR] [--output results.json]
+
+Results are printed and, with --output, written as JSON so runs can be
+compared to catch regressions.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_llmapp import summarize, git_commit
+from models.html_extractor import EXTRACTORS
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+REPEAT_START = "<!-- bench:repeat -->"
+REPEAT_END = "<!-- /bench:repeat -->"
+EXPECT_PATTERN = re.compile(r"<!-- bench:expect (.*?) -->")
+
+
+def baseline_extract(html: str) -> str:
+    """The extraction ScreenModel used before the pluggable extractors."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text(separator='\n', strip=True)
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
+def scale_html(html: str, factor: int) -> str:
+    """Repeat a fixture's marked content, or its whole body, to build a larger page."""
+    start = html.find(REPEAT_START)
+    end = html.find(REPEAT_END)
+    if start < 0 or end < start:
+        start = html.find(">", html.find("<body")) + 1
+        end = html.rfind("</body>")
+    if factor <= 1 or start <= 0 or end < start:
+        return html
+    return html[:start] + html[start:end] * factor + html[end:]
+
+
+def check_output(text: str, expected: List[str]) -> List[str]:
+    """List the ways an extractor's output falls short of a fixture's expectations."""
+    if not text.strip():
+        return ["empty output"]
+    return [f"missing {phrase!r}" for phrase in expected if phrase not in text]
+
+
+def bench_extract(extract: Callable[[str], str], html: str, runs: int, expected: List[str] = None) -> Dict[str, Any]:
+    text = extract(html)
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        extract(html)
+        samples.append(time.perf_counter() - t)
+    result = summarize(samples)
+    result["mb_per_sec"] = len(html.encode("utf-8")) / 1e6 / result["median"]
+    result["output_chars"] = len(text)
+    if expected is not None:
+        result["failures"] = check_output(text, expected)
+    return result
+
+
+def bench_fixture(html: str, runs: int) -> Dict[str, Any]:
+    expected = EXPECT_PATTERN.findall(html)
+    results = {"input_bytes": len(html.encode("utf-8")), "baseline": bench_extract(baseline_extract, html, runs)}
+    for name, extractor_class in EXTRACTORS.items():
+        try:
+            extractor = extractor_class()
+        except ImportError:
+            results[name] = {"skipped": "not installed"}
+            continue
+        results[name] = bench_extract(extractor.extract, html, runs, expected)
+        results[name]["speedup"] = results["baseline"]["median"] / results[name]["median"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="samples per measurement")
+    parser.add_argument("--scale", type=int, default=50, help="content repetitions for the large-page variant")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="directory of .html fixtures")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    fixtures = {}
+    for name in sorted(os.listdir(args.fixtures)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(args.fixtures, name), "r", encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            fixtures[name] = bench_fixture(html, args.runs)
+            if args.scale > 1:
+                fixtures[f"{name} x{args.scale}"] = bench_fixture(scale_html(html, args.scale), args.runs)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "scale": args.scale
+        },
+        "fixtures": fixtures
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    failures = [
+        f"{fixture} [{name}]: {failure}"
+        for fixture, fixture_results in fixtures.items()
+        for name, result in fixture_results.items()
+        if isinstance(result, dict)
+        for failure in result.get("failures", [])
+    ]
+    if failures:
+        print("Extraction checks failed:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
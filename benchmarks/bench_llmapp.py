@@ -0,0 +1,201 @@
+"""
+Cold-start, rerun and chat latency benchmarks for llmapp.
+
+Measures, against local Ollama and Anthropic stand-ins:
+  - import time of each heavy dependency and app module, in a fresh interpreter
+  - first render of llmapp (cold process, includes imports and model loading)
+  - rerun time once the app is warm
+  - per-stage process_chat timings for an Ollama and a Claude model
+
+Usage:
+    python benchmarks/bench_llmapp.py [--runs 5] [--output results.json]
+
+Results are printed and, with --output, written as JSON so runs can be
+compared to catch regressions.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Any
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stand_ins import StandInServer, OllamaHandler, AnthropicHandler, OLLAMA_MODEL, CLAUDE_MODEL
+
+IMPORT_MODULES = [
+    "streamlit",
+    "langchain_core",
+    "langchain_ollama",
+    "langchain_anthropic",
+    "anthropic",
+    "chromadb",
+    "bs4",
+    "models.display_model",
+    "models.screen_model",
+    "models.rag_model",
+    "models.model_settings",
+    "models.chat_model",
+    "llmapp",
+]
+
+APP_TIMEOUT = 120
+CHAT_PROMPT = "What does the benchmark measure?"
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "runs": samples
+    }
+
+
+def run_worker(stage: str, env: Dict[str, str], runs: int) -> Dict[str, Any]:
+    """Run a benchmark stage in a fresh interpreter and return its JSON result."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", stage, "--runs", str(runs)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{stage} worker failed:\n{result.stderr[-4000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_imports(env: Dict[str, str], runs: int) -> Dict[str, Any]:
+    """Time importing each module on its own in a fresh interpreter."""
+    timings = {}
+    for module in IMPORT_MODULES:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        samples = []
+        for _ in range(runs):
+            result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                samples = None
+                timings[module] = {"error": result.stderr.strip().splitlines()[-1]}
+                break
+            samples.append(float(result.stdout.strip().splitlines()[-1]))
+        if samples:
+            timings[module] = summarize(samples)
+    return timings
+
+
+def _new_app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(REPO_ROOT, "llmapp.py"), default_timeout=APP_TIMEOUT)
+
+
+def _check(at) -> None:
+    if at.exception:
+        raise RuntimeError(f"llmapp raised: {at.exception[0].message}")
+
+
+def worker_render(runs: int) -> Dict[str, Any]:
+    """First render in a cold process, then warm reruns."""
+    at = _new_app()
+    start = time.perf_counter()
+    at.run()
+    first_render = time.perf_counter() - start
+    _check(at)
+
+    reruns = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - start)
+        _check(at)
+    return {"first_render": first_render, "rerun": summarize(reruns)}
+
+
+def _switch_model(at, model_name: str) -> None:
+    at.selectbox[0].set_value(model_name)
+    next(button for button in at.button if button.label == "Switch Model").click()
+    at.run()
+    _check(at)
+
+
+def worker_chat(runs: int) -> Dict[str, Any]:
+    """Per-stage process_chat timings for each provider."""
+    at = _new_app()
+    at.run()
+    _check(at)
+
+    results = {}
+    for provider, model_name in (("ollama", OLLAMA_MODEL), ("claude", CLAUDE_MODEL)):
+        _switch_model(at, model_name)
+        samples: Dict[str, List[float]] = {}
+        for _ in range(runs):
+            at.chat_input[0].set_value(CHAT_PROMPT)
+            at.run()
+            _check(at)
+            for stage, seconds in at.session_state["last_chat_timings"].items():
+                if seconds is not None:
+                    samples.setdefault(stage, []).append(seconds)
+        results[provider] = {stage: summarize(values) for stage, values in samples.items()}
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds between streamed stand-in tokens")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--worker", choices=["render", "chat"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, REPO_ROOT)
+        worker = worker_render if args.worker == "render" else worker_chat
+        print(json.dumps(worker(args.runs)))
+        return
+
+    with StandInServer(OllamaHandler, args.token_delay) as ollama, \
+            StandInServer(AnthropicHandler, args.token_delay) as anthropic:
+        env = {
+            **os.environ,
+            "PYTHONPATH": REPO_ROOT,
+            "OLLAMA_BASE_URL": ollama.url,
+            "OLLAMA_HOST": ollama.url,
+            "ANTHROPIC_BASE_URL": anthropic.url,
+            "ANTHROPIC_API_KEY": "bench-key",
+            "LANGCHAIN_TRACING_V2": "false",
+        }
+        results = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": args.runs,
+                "token_delay": args.token_delay
+            },
+            "imports": bench_imports(env, args.runs),
+            "render": run_worker("render", env, args.runs),
+            "chat": run_worker("chat", env, args.runs)
+        }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Local stand-ins for the Ollama and Anthropic HTTP APIs.
+
+They implement just enough of each API for llmapp to list, load and chat with
+a model, streaming a fixed reply at a configurable token rate, so benchmarks
+measure the app rather than a model or the network.
+"""
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OLLAMA_MODEL = "bench-model:latest"
+CLAUDE_MODEL = "claude-bench"
+REPLY_TOKENS = ["This ", "is ", "a ", "benchmark ", "reply ", "from ", "a ", "local ", "stand-in. "] * 8
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class OllamaHandler(_Handler):
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": OLLAMA_MODEL, "model": OLLAMA_MODEL, "size": 1_000_000_000}]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [{
+                "name": OLLAMA_MODEL, "model": OLLAMA_MODEL, "size": 1_000_000_000, "expires_at": _now()
+            }]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json({"error": "not found"}, 404)
+            return
+        request = self._read_json()
+        model = request.get("model", OLLAMA_MODEL)
+        if not request.get("prompt"):
+            # Load-only request
+            self._send_json({"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "load"})
+            return
+        if request.get("stream") is False:
+            self._send_json({"model": model, "created_at": _now(), "response": "".join(REPLY_TOKENS), "done": True})
+            return
+        self._start_stream("application/x-ndjson")
+        for token in REPLY_TOKENS:
+            time.sleep(self.token_delay)
+            line = {"model": model, "created_at": _now(), "response": token, "done": False}
+            self._write_chunk(json.dumps(line).encode() + b"\n")
+        final = {"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "stop",
+                 "eval_count": len(REPLY_TOKENS)}
+        self._write_chunk(json.dumps(final).encode() + b"\n")
+        self._end_stream()
+
+
+class AnthropicHandler(_Handler):
+    MODEL = {"type": "model", "id": CLAUDE_MODEL, "display_name": "Claude Bench", "created_at": "2025-01-01T00:00:00Z"}
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/models":
+            self._send_json({"data": [self.MODEL], "has_more": False, "first_id": CLAUDE_MODEL, "last_id": CLAUDE_MODEL})
+        elif path == f"/v1/models/{CLAUDE_MODEL}":
+            self._send_json(self.MODEL)
+        else:
+            self._send_json({"type": "error", "error": {"type": "not_found_error", "message": "not found"}}, 404)
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/v1/messages":
+            self._send_json({"type": "error", "error": {"type": "not_found_error", "message": "not found"}}, 404)
+            return
+        request = self._read_json()
+        message = {
+            "id": "msg_bench", "type": "message", "role": "assistant", "model": request.get("model", CLAUDE_MODEL),
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 0}
+        }
+        if not request.get("stream"):
+            message["content"] = [{"type": "text", "text": "".join(REPLY_TOKENS)}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = len(REPLY_TOKENS)
+            self._send_json(message)
+            return
+
+        def event(name, data):
+            self._write_chunk(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+        self._start_stream("text/event-stream")
+        event("message_start", {"type": "message_start", "message": message})
+        event("content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}})
+        for token in REPLY_TOKENS:
+            time.sleep(self.token_delay)
+            event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                          "delta": {"type": "text_delta", "text": token}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": len(REPLY_TOKENS)}})
+        event("message_stop", {"type": "message_stop"})
+        self._end_stream()
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is expected
+        pass
+
+
+class StandInServer:
+    """Runs a stand-in API on a free local port in a background thread."""
+
+    def __init__(self, handler, token_delay: float = 0.005):
+        self.handler = type(handler.__name__, (handler,), {"token_delay": token_delay})
+        self.server = _QuietServer(("127.0.0.1", 0), self.handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
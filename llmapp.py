@@ -1,5 +1,9 @@
 import streamlit as st
 from dotenv import load_dotenv
+
+# Load .env before the model modules read their settings from the environment
+load_dotenv()
+
 from models.chat_model import ChatModel
 from models.screen_model import ScreenModel
 from models.model_settings import ModelSettings
@@ -9,7 +13,8 @@ from models.rag_model import RagModel
 def init_models():
     """Initialize all model instances."""
     rag_model = RagModel()
-    if not rag_model.initialize_rag():
+    # The RAG stack is only loaded once RAG is enabled
+    if rag_model.is_enabled() and not rag_model.initialize_rag():
         st.warning("RAG functionality may be limited - failed to initialize RAG database")
         
     chat_model = ChatModel(rag_model=rag_model)
@@ -34,6 +39,12 @@ def main():
         st.session_state.last_model if 'last_model' in st.session_state else None
     )
     
+    # Start loading a newly selected model while the user decides to switch, where the
+    # configuration allows it and it fits the Ollama memory budget
+    if (selected_model and not switch_model and model_settings.get_current_model()
+            and selected_model != st.session_state.get('last_model')):
+        model_settings.preload_model(selected_model)
+    
     # Handle model switching
     if switch_model or not model_settings.get_current_model():
         with display_model.display_loading_spinner(f"Loading {selected_model}..."):
@@ -61,6 +72,9 @@ def main():
             display_model.display_info("Please select and load a model from the sidebar to begin.")
             return
         
+        # Keep the active model loaded between messages
+        model_settings.keep_resident(st.session_state.last_model)
+        
         # Set up RAG controls
         display_model.setup_rag_controls(rag_container, rag_model)
         
@@ -1,19 +1,106 @@
-from langchain.callbacks.base import BaseCallbackHandler
+from langchain_core.callbacks import BaseCallbackHandler
 import streamlit as st
-from langchain_ollama import OllamaLLM
 import os
-from langchain_anthropic import ChatAnthropic
-from typing import Union, List
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Tuple, Optional, Callable, TYPE_CHECKING
+from models.prompt_builder import PromptBuilder, DEFAULT_OUTPUT_RESERVE
+from models.conversation_memory import ConversationMemory
+from models.llm_registry import get_llm_registry
+from models.providers import provider_for_client
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+
+# Maximum seconds to wait for each context source before answering without it
+CONTEXT_SOURCE_TIMEOUTS = {
+    "rag": 5.0
+}
+
+# Re-render streamed text at most this often (seconds) or after this many new characters
+STREAM_FLUSH_INTERVAL = 0.1
+STREAM_FLUSH_CHARS = 200
+
+# Shared across sessions; context sources are I/O- or native-code-bound. Turn
+# pipelines get their own pool so they can never starve the sources they wait on.
+# Neither runs with the Streamlit script context: sources return their results
+# and notices, which are rendered on the script thread, so a source that times
+# out cannot write to the page afterwards.
+_context_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-context")
+_pipeline_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-pipeline")
 
 class StreamHandler(BaseCallbackHandler):
-    def __init__(self, container, initial_text=""):
+    """
+    Streams LLM tokens into a Streamlit placeholder.
+    
+    Tokens are buffered and the placeholder is re-rendered at most every
+    flush_interval seconds or flush_chars characters, with a final flush when
+    the LLM finishes, so long answers don't re-render on every token.
+    """
+
+    def __init__(self, container, initial_text="", flush_interval: float = STREAM_FLUSH_INTERVAL,
+                 flush_chars: int = STREAM_FLUSH_CHARS):
         self.container = container
-        self.text = initial_text
         self.placeholder = container.empty()
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self._parts: List[str] = [initial_text] if initial_text else []
+        self._pending_chars = 0
+        self._last_flush = time.perf_counter()
+        self.start_time = time.perf_counter()
+        self.first_token_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.token_count = 0
 
-    def on_llm_new_token(self, token: str, **kwargs) -> None:
-        self.text += token
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def _flush(self) -> None:
         self.placeholder.markdown(self.text)
+        self._pending_chars = 0
+        self._last_flush = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self.start_time = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self.start_time = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        now = time.perf_counter()
+        if self.first_token_time is None:
+            self.first_token_time = now
+        self.token_count += 1
+        self._parts.append(token)
+        self._pending_chars += len(token)
+        if self._pending_chars >= self.flush_chars or now - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        self.end_time = time.perf_counter()
+        if self._pending_chars:
+            self._flush()
+
+    def on_llm_error(self, error, **kwargs) -> None:
+        self.end_time = time.perf_counter()
+        if self._pending_chars:
+            self._flush()
+
+    def get_metrics(self) -> Dict[str, Optional[float]]:
+        """Get time to first token (seconds) and generation speed (tokens/sec)."""
+        ttft = self.first_token_time - self.start_time if self.first_token_time is not None else None
+        tokens_per_sec = None
+        if self.first_token_time is not None and self.token_count > 1:
+            elapsed = (self.end_time or time.perf_counter()) - self.first_token_time
+            if elapsed > 0:
+                tokens_per_sec = (self.token_count - 1) / elapsed
+        return {
+            "time_to_first_token": ttft,
+            "tokens_per_sec": tokens_per_sec,
+            "tokens": self.token_count
+        }
 
 class ChatModel:
     def __init__(self, rag_model=None):
@@ -22,12 +109,18 @@ class ChatModel:
         if 'current_model' not in st.session_state:
             st.session_state.current_model = None
         self.rag_model = rag_model
+        self.memory = ConversationMemory()
+        self.last_prompt_report: Dict[str, int] = {}
+        self.last_stream_metrics: Dict[str, Optional[float]] = {}
+        # Seconds spent in each stage of the last process_chat call
+        self.timings: Dict[str, Optional[float]] = {}
 
     def _check_and_clear_messages(self, new_model: str):
         """Clear messages if model has changed."""
         if st.session_state.current_model != new_model:
             st.session_state.messages = []
             st.session_state.current_model = new_model
+            self.memory.clear()
 
     def add_message(self, role: str, content: str):
         """Add a message to the chat history."""
@@ -43,12 +136,107 @@ class ChatModel:
             role = "assistant" if message["role"] == "AI" else "user"
             st.chat_message(role).write(message["content"])
 
-    def process_chat(self, prompt: str, llm: Union[OllamaLLM, ChatAnthropic], webpage_content: str = None):
+    def _format_webpage_context(self, webpage_content: str) -> str:
+        """Clean webpage content for use as prompt context."""
+        return webpage_content.strip()
+
+    def _format_history(self, messages: List[Dict[str, str]]) -> List[str]:
+        """Format previous chat messages as prompt context, oldest first."""
+        return [
+            f"{'Assistant' if message['role'] == 'AI' else 'User'}: {message['content']}"
+            for message in messages
+        ]
+
+    def _build_prompt(self, llm: "BaseLanguageModel", system_prompts: List[str], prompt: str,
+                      rag_parts: Optional[List[str]], webpage_context: Optional[str],
+                      summary: str, history: List[Dict[str, str]]) -> str:
+        """
+        Assemble the prompt within the model's token budget.
+        
+        System prompts and the question are always included; RAG chunks, the
+        webpage excerpt, the conversation summary and recent history share what
+        is left, in that order.
+        """
+        builder = PromptBuilder(
+            model_name=getattr(llm, "model", "") or "",
+            output_reserve=getattr(llm, "max_tokens", None) or DEFAULT_OUTPUT_RESERVE,
+            context_window=provider_for_client(llm).context_window(llm)
+        )
+        builder.add_section("system", system_prompts, required=True)
+        if rag_parts:
+            builder.add_section(
+                "rag", rag_parts, priority=0, share=0.5,
+                header=f"RAG Context (showing top {len(rag_parts)} relevant documents):"
+            )
+        builder.add_section("webpage", webpage_context, priority=1, share=0.2, header="Webpage Context:")
+        builder.add_section("summary", summary, priority=2, share=0.1, header="Summary of earlier conversation:")
+        builder.add_section(
+            "history", self._format_history(history), priority=3, share=0.2,
+            header="Conversation so far:", keep_newest=True
+        )
+        builder.add_section("question", [
+            f"User question: {prompt}",
+            "Please provide a concise answer to the users question. Only reference the document if asked for it"
+        ], required=True)
+        enhanced_prompt, self.last_prompt_report = builder.build()
+        return enhanced_prompt
+
+    async def _run_context_source(self, name: str, fn: Callable, args: Tuple) -> Tuple[Any, str]:
+        """
+        Run one context source on the shared executor with a bounded timeout.
+        
+        A source that times out keeps running on its worker, but its result is discarded.
+        
+        Returns:
+            Tuple of (context, status) where status is 'ok', 'timeout' or 'error'
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            context = await asyncio.wait_for(
+                loop.run_in_executor(_context_executor, fn, *args),
+                timeout=CONTEXT_SOURCE_TIMEOUTS.get(name, 5.0)
+            )
+            return context, "ok"
+        except asyncio.TimeoutError:
+            return None, "timeout"
+        except Exception:
+            return None, "error"
+
+    async def _gather_context(self, sources: Dict[str, Tuple[Callable, Tuple]]) -> Dict[str, Tuple[Any, str]]:
+        """Run the context sources concurrently."""
+        results = await asyncio.gather(*(
+            self._run_context_source(name, fn, args) for name, (fn, args) in sources.items()
+        ))
+        return dict(zip(sources.keys(), results))
+
+    def _start_context_gathering(self, prompt: str):
+        """Start gathering context in the background and return a future for the results."""
+        # Session state is read here, on the script thread; the sources never touch Streamlit
+        sources = {}
+        if self.rag_model and self.rag_model.is_enabled():
+            sources["rag"] = (self.rag_model.get_rag_context_parts, (prompt, self.rag_model.get_n_results()))
+        return _pipeline_executor.submit(asyncio.run, self._gather_context(sources))
+
+    def process_chat(self, prompt: str, llm: "BaseLanguageModel", webpage_content: str = None):
         """Process a chat message and generate a response."""
+        self.timings = {}
+        start = stage_start = time.perf_counter()
+
+        def record(stage: str) -> None:
+            nonlocal stage_start
+            now = time.perf_counter()
+            self.timings[stage] = now - stage_start
+            stage_start = now
+
         try:
+            # Start retrieval the moment the prompt arrives so it overlaps the UI and LLM setup
+            context_future = self._start_context_gathering(prompt)
+            
             # Clear messages if model changes
-            current_model = llm.model if isinstance(llm, OllamaLLM) else "anthropic"
+            provider = provider_for_client(llm)
+            current_model = provider.model_name(llm)
             self._check_and_clear_messages(current_model)
+            summary, history = self.memory.get_context(list(self.get_messages()))
 
             # Add user message
             self.add_message("user", prompt)
@@ -58,20 +246,13 @@ class ChatModel:
             chat_container = st.chat_message("assistant")
             stream_handler = StreamHandler(chat_container)
 
-            # Create streaming LLM instance based on model type
-            if isinstance(llm, OllamaLLM):
-                streaming_llm = OllamaLLM(
-                    model=llm.model,
-                    callbacks=[stream_handler],
-                    temperature=0.6
-                )
-            else:  # ChatAnthropic
-                # Re-use the existing model's configuration
-                streaming_llm = llm
-                streaming_llm.callbacks = [stream_handler]
+            # Shared client from the registry; the handler is passed per invocation
+            streaming_llm = get_llm_registry().get(current_model, temperature=provider.chat_temperature)
+            invoke_config = {"callbacks": [stream_handler]}
 
             # Prepare combined context from RAG and webpage if available
-            context_parts = []
+            rag_parts = None
+            webpage_context = None
             system_prompts = []
             
             # Add system prompt for general behavior
@@ -84,40 +265,48 @@ class ChatModel:
             Sometimes, you may draw from external information.
 
             Never mention "RAG" in my responses.""")
+            record("setup")
+            
+            # Each source has its own timeout, so a slow one only drops its own context
+            context = context_future.result()
+            record("context_wait")
             
             # Add RAG context if available
-            rag_enabled = self.rag_model and self.rag_model.is_enabled()
-            if rag_enabled:
-                rag_context = self.rag_model.get_rag_context(prompt)
-                if rag_context:
-                    context_parts.append(rag_context)
+            if "rag" in context:
+                rag_result, status = context["rag"]
+                if status == "ok":
+                    rag_parts, notice = rag_result
+                    self.rag_model.show_notice(notice)
+                    if not rag_parts:
+                        system_prompts.append("Note: RAG is enabled but no relevant documents were found for this query.")
                 else:
-                    system_prompts.append("Note: RAG is enabled but no relevant documents were found for this query.")
+                    st.warning("Document retrieval took too long or failed; answering without document context.")
             
-            # Add webpage context if available    
+            # Add webpage context if available; it is only cleaned, so it needs no worker
             if webpage_content:
-                context_parts.append(f"Webpage Context:\n{webpage_content[:3000]}...")
+                webpage_context = self._format_webpage_context(webpage_content)
             
-            # Construct the enhanced prompt
-            enhanced_prompt = "\n\n".join([
-                *system_prompts,
-                *context_parts,
-                f"User question: {prompt}",
-                "Please provide a concise answer to the users question. Only reference the document if asked for it"
-            ])
+            # Construct the enhanced prompt within the model's token budget
+            enhanced_prompt = self._build_prompt(
+                llm, system_prompts, prompt, rag_parts, webpage_context, summary, history
+            )
+            record("prompt_build")
 
             # Get AI response with streaming
-            if isinstance(streaming_llm, OllamaLLM):
-                response = streaming_llm.invoke(enhanced_prompt)
-            else:  # ChatAnthropic
-                from langchain_core.messages import HumanMessage
-                response = streaming_llm.invoke([HumanMessage(content=enhanced_prompt)])
-                # Extract content from the response
-                response = response.content
+            response = provider.invoke(streaming_llm, enhanced_prompt, config=invoke_config)
+            self.last_stream_metrics = stream_handler.get_metrics()
+            record("llm")
+            self.timings["time_to_first_token"] = self.last_stream_metrics["time_to_first_token"]
 
             # Add AI response to chat history
             self.add_message("AI", response)
 
+            # Fold older turns into the running summary off the request path
+            self.memory.update(self.get_messages(), llm)
+            record("history_update")
+            self.timings["total"] = time.perf_counter() - start
+            st.session_state.last_chat_timings = dict(self.timings)
+
             return response
         except Exception as e:
             st.error(f"Error in chat processing: {str(e)}")
@@ -0,0 +1,126 @@
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Tuple, Optional, Any
+from models.providers import provider_for_client
+
+# Most recent messages always sent verbatim (three user/assistant turns)
+RECENT_MESSAGES = 6
+
+# Summarize once this many messages have aged out of the recent window
+SUMMARIZE_BATCH = 4
+
+# Long messages are clipped before being sent to the summarizer
+MAX_MESSAGE_CHARS = 2000
+
+MAX_SUMMARY_WORDS = 200
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an AI assistant.
+Keep facts, names, decisions and open questions the assistant may need later. Use at most {max_words} words.
+Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+# Summaries never touch the UI, so they run without a Streamlit script context
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+class ConversationMemory:
+    """
+    Conversation history with a rolling summary of older turns.
+
+    Recent messages are kept verbatim. Once enough older messages have
+    accumulated they are folded into a running summary by a background LLM
+    call; the summary is cached in the session and picked up on a later turn,
+    so chat responses never wait on it.
+    """
+
+    def __init__(self, recent_messages: int = RECENT_MESSAGES, summarize_batch: int = SUMMARIZE_BATCH):
+        self.recent_messages = recent_messages
+        self.summarize_batch = summarize_batch
+        if 'conversation_memory' not in st.session_state:
+            st.session_state.conversation_memory = self._empty_state()
+
+    @staticmethod
+    def _empty_state(generation: int = 0) -> Dict[str, Any]:
+        return {
+            "summary": "",
+            "summarized": 0,
+            "pending": None,
+            "generation": generation
+        }
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        return st.session_state.conversation_memory
+
+    def clear(self) -> None:
+        """Forget the summary, discarding any summarization still running."""
+        st.session_state.conversation_memory = self._empty_state(self.state["generation"] + 1)
+
+    def get_context(self, messages: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Get the conversation context for the next prompt.
+
+        Returns:
+            Tuple of (summary, messages not yet covered by the summary)
+        """
+        self._apply_pending()
+        return self.state["summary"], messages[self.state["summarized"]:]
+
+    def update(self, messages: List[Dict[str, str]], llm) -> None:
+        """Start summarizing older messages in the background if enough have accumulated."""
+        self._apply_pending()
+        state = self.state
+        if state["pending"] is not None:
+            return
+
+        upto = len(messages) - self.recent_messages
+        if upto - state["summarized"] < self.summarize_batch:
+            return
+
+        new_messages = messages[state["summarized"]:upto]
+        future = _summary_executor.submit(self._summarize, llm, state["summary"], new_messages)
+        state["pending"] = (future, upto, state["generation"])
+
+    def _apply_pending(self) -> None:
+        """Fold a finished background summary into the cached state."""
+        state = self.state
+        pending: Optional[Tuple[Future, int, int]] = state["pending"]
+        if pending is None:
+            return
+        future, upto, generation = pending
+        if not future.done():
+            return
+        state["pending"] = None
+        if generation != state["generation"]:
+            return
+        try:
+            summary = future.result()
+        except Exception:
+            # Keep the previous summary; the messages stay verbatim and are retried next turn
+            return
+        if summary:
+            state["summary"] = summary
+            state["summarized"] = upto
+
+    @staticmethod
+    def _summarize(llm, summary: str, messages: List[Dict[str, str]]) -> str:
+        # Shared clients carry no callbacks, so the summary never streams into the chat
+        lines = []
+        for message in messages:
+            role = "Assistant" if message["role"] == "AI" else "User"
+            content = message["content"] or ""
+            if len(content) > MAX_MESSAGE_CHARS:
+                content = content[:MAX_MESSAGE_CHARS] + "..."
+            lines.append(f"{role}: {content}")
+
+        prompt = SUMMARY_PROMPT.format(
+            max_words=MAX_SUMMARY_WORDS,
+            summary=summary or "(none yet)",
+            messages="\n".join(lines)
+        )
+        return provider_for_client(llm).invoke(llm, prompt).strip()
@@ -44,6 +44,9 @@ class DisplayModel:
             col1, col2 = st.columns(2)
             with col1:
                 st.metric("📚 Documents", stats["total_documents"])
+            with col2:
+                cache_stats = rag_model.get_cache_stats()
+                st.metric("⚡ Cache hit rate", f"{cache_stats['hit_rate']:.0%}")
             
             # Controls when enabled
             if enabled:
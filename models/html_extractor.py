@@ -0,0 +1,279 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output changes so cached page text is re-extracted
+EXTRACTOR_VERSION = 2
+
+# Elements that never hold page content
+BOILERPLATE_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "aside", "button", "select", "textarea"
+]
+BOILERPLATE_ROLES = ["navigation", "complementary", "search"]
+BOILERPLATE_SELECTOR = ", ".join(
+    BOILERPLATE_TAGS + [f'[role="{role}"]' for role in BOILERPLATE_ROLES] + ['[aria-hidden="true"]']
+)
+
+# Site headers and footers; only removed at page level, since inside an
+# article or main section they hold the title, byline or footnotes
+PAGE_LANDMARK_TAGS = ["header", "footer"]
+PAGE_LANDMARK_ROLES = ["banner", "contentinfo"]
+PAGE_LANDMARK_SELECTOR = ", ".join(PAGE_LANDMARK_TAGS + [f'[role="{role}"]' for role in PAGE_LANDMARK_ROLES])
+
+# Main content containers, most specific first; a single <article> also counts
+MAIN_CONTENT_SELECTORS = ["main", '[role="main"]']
+CONTENT_SELECTOR = 'main, article, [role="main"]'
+
+# Forms are removed unless they contain the main content or hold more than
+# this share of the page's text, as when a whole page is wrapped in one form
+FORM_CONTENT_SHARE = 0.5
+
+# A main content container with less text than this is ignored in favour of the whole body
+MIN_MAIN_CONTENT_CHARS = 200
+
+# Force a backend with HTML_EXTRACTOR=selectolax|lxml|bs4
+HTML_EXTRACTOR = os.getenv('HTML_EXTRACTOR', '')
+
+
+class HTMLExtractor:
+    """
+    Extracts the readable main content of an HTML page as text.
+
+    Boilerplate (scripts, styles, navigation, sidebars, page-level headers and
+    footers, and forms that do not wrap the content) is removed, then the text
+    of the page's main content container is returned, one text fragment per
+    line. If the page has no usable main container, the whole body is used.
+    Parser libraries are imported when an extractor is created, so unavailable
+    backends can be skipped.
+    """
+    name = ""
+
+    @property
+    def id(self) -> str:
+        """Identifies the backend and extraction version, e.g. for cache entries."""
+        return f"{self.name}-{EXTRACTOR_VERSION}"
+
+    def extract(self, html: str) -> str:
+        """Extract the main content text of a page, one stripped line per text line."""
+        text = self._extract(html)
+        return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+    def _extract(self, html: str) -> str:
+        raise NotImplementedError
+
+
+class SelectolaxExtractor(HTMLExtractor):
+    """Extractor on selectolax's lexbor HTML5 parser, the fastest backend."""
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    @staticmethod
+    def _in_content(node) -> bool:
+        node = node.parent
+        while node is not None:
+            if node.tag in ("main", "article") or (node.attributes or {}).get("role") == "main":
+                return True
+            node = node.parent
+        return False
+
+    def _extract(self, html: str) -> str:
+        tree = self._parser(html)
+        root = tree.body or tree.root
+        if root is None:
+            return ""
+        for node in tree.css(BOILERPLATE_SELECTOR):
+            node.decompose()
+        for node in tree.css(PAGE_LANDMARK_SELECTOR):
+            if not self._in_content(node):
+                node.decompose()
+        forms = tree.css("form")
+        if forms:
+            page_chars = len(root.text(strip=True))
+            for form in forms:
+                if form.css_first(CONTENT_SELECTOR) is None and \
+                        len(form.text(strip=True)) <= FORM_CONTENT_SHARE * page_chars:
+                    form.decompose()
+
+        for container in self._main_candidates(tree):
+            text = container.text(separator="\n", strip=True, skip_empty=True)
+            if len(text) >= MIN_MAIN_CONTENT_CHARS:
+                return text
+        return root.text(separator="\n", strip=True, skip_empty=True)
+
+    @staticmethod
+    def _main_candidates(tree) -> List:
+        candidates = [node for selector in MAIN_CONTENT_SELECTORS for node in tree.css(selector)[:1]]
+        articles = tree.css("article")
+        if len(articles) == 1:
+            candidates.append(articles[0])
+        return candidates
+
+
+class LxmlExtractor(HTMLExtractor):
+    """Extractor on lxml's libxml2 HTML parser."""
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.etree import XPath
+        self._fromstring = lxml.html.fromstring
+        # lxml's CSS support needs the separate cssselect package, so match with XPath
+        self._boilerplate = XPath(" | ".join(
+            [f"//{tag}" for tag in BOILERPLATE_TAGS]
+            + [f'//*[@role="{role}"]' for role in BOILERPLATE_ROLES]
+            + ['//*[@aria-hidden="true"]']
+        ))
+        in_content = 'ancestor::main or ancestor::article or ancestor::*[@role="main"]'
+        self._page_landmarks = XPath(" | ".join(
+            [f"//{tag}[not({in_content})]" for tag in PAGE_LANDMARK_TAGS]
+            + [f'//*[@role="{role}"][not({in_content})]' for role in PAGE_LANDMARK_ROLES]
+        ))
+        self._forms = XPath('//form[not(descendant::main or descendant::article or descendant::*[@role="main"])]')
+        self._main = [XPath("//main"), XPath('//*[@role="main"]')]
+        self._article = XPath("//article")
+
+    @staticmethod
+    def _text(node) -> str:
+        return "\n".join(fragment for fragment in (t.strip() for t in node.itertext()) if fragment)
+
+    @staticmethod
+    def _text_length(node) -> int:
+        return sum(len(t.strip()) for t in node.itertext())
+
+    def _extract(self, html: str) -> str:
+        if not html.strip():
+            return ""
+        try:
+            root = self._fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            root = self._fromstring(html.encode("utf-8"))
+        for node in self._boilerplate(root):
+            node.drop_tree()
+        for node in self._page_landmarks(root):
+            node.drop_tree()
+        forms = self._forms(root)
+        if forms:
+            page_chars = self._text_length(root)
+            for form in forms:
+                if self._text_length(form) <= FORM_CONTENT_SHARE * page_chars:
+                    form.drop_tree()
+
+        candidates = [matches[0] for matches in (select(root) for select in self._main) if matches]
+        articles = self._article(root)
+        if len(articles) == 1:
+            candidates.append(articles[0])
+        for container in candidates:
+            text = self._text(container)
+            if len(text) >= MIN_MAIN_CONTENT_CHARS:
+                return text
+
+        body = root.find("body")
+        return self._text(body if body is not None else root)
+
+
+class BeautifulSoupExtractor(HTMLExtractor):
+    """Pure-Python fallback on BeautifulSoup's html.parser."""
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    @staticmethod
+    def _in_content(node) -> bool:
+        return node.find_parent(["main", "article"]) is not None or \
+            node.find_parent(attrs={"role": "main"}) is not None
+
+    def _extract(self, html: str) -> str:
+        soup = self._soup(html, "html.parser")
+        root = soup.body or soup
+        for node in soup.select(BOILERPLATE_SELECTOR):
+            node.decompose()
+        for node in soup.select(PAGE_LANDMARK_SELECTOR):
+            if not self._in_content(node):
+                node.decompose()
+        forms = soup.find_all("form")
+        if forms:
+            page_chars = len(root.get_text(strip=True))
+            for form in forms:
+                if form.select_one(CONTENT_SELECTOR) is None and \
+                        len(form.get_text(strip=True)) <= FORM_CONTENT_SHARE * page_chars:
+                    form.decompose()
+
+        candidates = [soup.select_one(selector) for selector in MAIN_CONTENT_SELECTORS]
+        articles = soup.find_all("article", limit=2)
+        if len(articles) == 1:
+            candidates.append(articles[0])
+        for container in candidates:
+            if container is None:
+                continue
+            text = container.get_text(separator="\n", strip=True)
+            if len(text) >= MIN_MAIN_CONTENT_CHARS:
+                return text
+
+        return root.get_text(separator="\n", strip=True)
+
+
+# Tried in order; the first whose parser library is installed is used
+EXTRACTORS = {
+    "selectolax": SelectolaxExtractor,
+    "lxml": LxmlExtractor,
+    "bs4": BeautifulSoupExtractor,
+}
+
+_extractors: Dict[str, HTMLExtractor] = {}
+_default_extractor: Optional[HTMLExtractor] = None
+_extractors_lock = threading.Lock()
+
+
+def _create_extractor(name: str) -> HTMLExtractor:
+    """Create a backend once, reusing it and its compiled queries afterwards; callers hold the lock."""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor: {name} (choose from {', '.join(EXTRACTORS)})")
+    if name not in _extractors:
+        _extractors[name] = EXTRACTORS[name]()
+    return _extractors[name]
+
+
+def _select_default() -> HTMLExtractor:
+    """Use the HTML_EXTRACTOR backend if it is valid and installed, else the fastest installed one."""
+    if HTML_EXTRACTOR:
+        try:
+            return _create_extractor(HTML_EXTRACTOR)
+        except (ValueError, ImportError) as e:
+            logger.warning(f"Ignoring HTML_EXTRACTOR={HTML_EXTRACTOR}: {str(e)}")
+    for name in EXTRACTORS:
+        try:
+            return _create_extractor(name)
+        except ImportError:
+            continue
+    raise ImportError("No HTML parser installed; install lxml, selectolax or beautifulsoup4")
+
+
+def get_extractor(name: Optional[str] = None) -> HTMLExtractor:
+    """
+    Get a shared HTML extractor.
+
+    Args:
+        name: Backend to use; defaults to HTML_EXTRACTOR, else the fastest installed one.
+            The default is chosen once per process.
+
+    Raises:
+        ValueError: If name is not a known backend
+        ImportError: If the requested backend's parser is not installed
+    """
+    global _default_extractor
+    with _extractors_lock:
+        if name:
+            return _create_extractor(name)
+        if _default_extractor is None:
+            _default_extractor = _select_default()
+        return _default_extractor
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Tuple, TYPE_CHECKING
+from models.providers import get_provider, DEFAULT_TEMPERATURE
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+
+
+class LLMRegistry:
+    """
+    Process-wide pool of LLM clients, one per model and temperature.
+
+    Clients are built once by their provider and shared by every session;
+    each holds its own HTTP connection pool. They carry no callbacks - callers pass their
+    streaming handler per invocation through the config argument, so
+    concurrent sessions never see each other's handlers.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, float], "BaseLanguageModel"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, temperature: float = DEFAULT_TEMPERATURE) -> "BaseLanguageModel":
+        """Get the shared client for a model, creating it on first use."""
+        key = (model_name, temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = self._create(model_name, temperature)
+            return client
+
+    def _create(self, model_name: str, temperature: float) -> "BaseLanguageModel":
+        return get_provider(model_name).create_client(model_name, temperature)
+
+    def evict(self, model_name: str) -> None:
+        """Drop all clients for a model."""
+        with self._lock:
+            for key in [key for key in self._clients if key[0] == model_name]:
+                del self._clients[key]
+
+    def clear(self) -> None:
+        """Drop every client."""
+        with self._lock:
+            self._clients.clear()
+
+
+_registry = LLMRegistry()
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Get the process-wide LLM client registry."""
+    return _registry
@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+import requests
+from typing import List, Dict, Optional, Callable
+
+OLLAMA_BASE_URL = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+
+# Serve cached listings for this long before refreshing them in the background
+MODEL_LIST_TTL = 60.0
+
+# Per-endpoint timeouts (seconds) for model listing requests
+OLLAMA_LIST_TIMEOUT = 2.0
+ANTHROPIC_LIST_TIMEOUT = 5.0
+
+# On a cold cache, wait at most this long for the first listing before rendering without it
+COLD_START_WAIT = 2.0
+
+
+def list_ollama_models() -> List[str]:
+    """List models installed in the local Ollama server."""
+    response = requests.get(f'{OLLAMA_BASE_URL}/api/tags', timeout=OLLAMA_LIST_TIMEOUT)
+    response.raise_for_status()
+    return [model['name'] for model in response.json().get('models', [])]
+
+
+def list_claude_models() -> List[str]:
+    """List Claude models available to the configured API key."""
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return []
+    import anthropic
+    client = anthropic.Anthropic(api_key=api_key, timeout=ANTHROPIC_LIST_TIMEOUT, max_retries=0)
+    return [model.id for model in client.models.list().data if model.id.startswith('claude')]
+
+
+def check_claude_model(model_name: str) -> None:
+    """Check that a Claude model exists and the configured API key can use it."""
+    import anthropic
+    client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), timeout=ANTHROPIC_LIST_TIMEOUT)
+    client.models.retrieve(model_name)
+
+
+class ModelCatalog:
+    """
+    Process-wide cache of available models per provider.
+
+    Reads always return the cached listing immediately. Listings older than
+    the TTL are refreshed by a single background thread (stale-while-revalidate),
+    so page reruns never wait on model-listing requests. Fetch errors are kept
+    with the entry for the UI to display; the previous listing stays in use.
+    """
+
+    def __init__(self, sources: Optional[Dict[str, Callable[[], List[str]]]] = None, ttl: float = MODEL_LIST_TTL):
+        self.sources = sources or {"ollama": list_ollama_models, "claude": list_claude_models}
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {
+            name: {"models": [], "fetched_at": None, "error": None} for name in self.sources
+        }
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Thread] = None
+        self._first_refresh = threading.Event()
+
+    def _is_stale(self) -> bool:
+        now = time.monotonic()
+        return any(
+            entry["fetched_at"] is None or now - entry["fetched_at"] > self.ttl
+            for entry in self._entries.values()
+        )
+
+    def refresh(self, wait: bool = False) -> None:
+        """Start a background refresh unless one is already running."""
+        with self._lock:
+            thread = self._refreshing
+            if thread is None or not thread.is_alive():
+                thread = self._refreshing = threading.Thread(
+                    target=self._refresh_all, name="model-catalog-refresh", daemon=True
+                )
+                thread.start()
+        if wait:
+            thread.join()
+
+    def _refresh_all(self) -> None:
+        try:
+            for name, fetch in self.sources.items():
+                try:
+                    models, error = fetch(), None
+                except Exception as e:
+                    models, error = None, str(e)
+                with self._lock:
+                    entry = self._entries[name]
+                    if models is not None:
+                        entry["models"] = models
+                    entry["error"] = error
+                    entry["fetched_at"] = time.monotonic()
+        finally:
+            self._first_refresh.set()
+
+    def get(self) -> Dict[str, Dict]:
+        """
+        Get the cached listing per provider, starting a refresh if it is stale.
+
+        Returns:
+            Dict mapping provider name to {'models': [...], 'error': str or None}
+        """
+        if self._is_stale():
+            self.refresh()
+            if not self._first_refresh.is_set():
+                self._first_refresh.wait(COLD_START_WAIT)
+        with self._lock:
+            return {
+                name: {"models": list(entry["models"]), "error": entry["error"]}
+                for name, entry in self._entries.items()
+            }
+
+    def invalidate(self) -> None:
+        """Mark every listing stale so the next read refreshes it."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["fetched_at"] = None
+
+
+_catalog = ModelCatalog()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """Get the process-wide model catalog."""
+    return _catalog
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Set
+from models.ollama_api import (
+    list_running, load_model, preload_model, unload_model, get_model_size, OLLAMA_KEEP_ALIVE,
+    OLLAMA_ACTIVE_KEEP_ALIVE
+)
+
+# Models to keep loaded in the background, e.g. "llama3.1:8b,mistral:latest"
+OLLAMA_HOT_MODELS = [name.strip() for name in os.getenv('OLLAMA_HOT_MODELS', '').split(',') if name.strip()]
+
+# Also preload any model as soon as it is selected, before the user switches to it
+OLLAMA_PRELOAD_SELECTED = os.getenv('OLLAMA_PRELOAD_SELECTED', 'false').lower() in ('1', 'true', 'yes')
+
+# Memory Ollama may use for loaded models, in GB; unset or 0 means no limit
+OLLAMA_MEMORY_BUDGET_GB = float(os.getenv('OLLAMA_MEMORY_BUDGET_GB', '0') or 0)
+
+# How often (seconds) to reconcile loaded models with the desired state
+RESIDENCY_CHECK_INTERVAL = 15.0
+
+# A model stops counting as active when no session has used it for this long
+ACTIVE_MODEL_TIMEOUT = 600.0
+
+
+def _model_key(name: str) -> str:
+    """Normalize a model name the way Ollama reports it."""
+    return name if ':' in name else f"{name}:latest"
+
+
+class ResidencyManager:
+    """
+    Keeps the right Ollama models in memory, based on /api/ps.
+
+    Models in active use are pinned with OLLAMA_ACTIVE_KEEP_ALIVE, configured hot
+    models are preloaded with OLLAMA_KEEP_ALIVE, and when loaded models exceed
+    the memory budget, idle ones are unloaded, soonest-expiring first. Models
+    that stop being active are unpinned so Ollama's normal expiry applies.
+    Reconciliation runs on a background thread every check_interval seconds
+    from the first touch until nothing is active or pinned, so page reruns
+    never wait on it and idle models are unpinned even with no traffic.
+    """
+
+    def __init__(self, hot_models: Optional[List[str]] = None, memory_budget_gb: float = OLLAMA_MEMORY_BUDGET_GB,
+                 check_interval: float = RESIDENCY_CHECK_INTERVAL):
+        self.hot_models = [_model_key(name) for name in (OLLAMA_HOT_MODELS if hot_models is None else hot_models)]
+        self.memory_budget = int(memory_budget_gb * 1024 ** 3)
+        self.check_interval = check_interval
+        self._active: Dict[str, float] = {}
+        self._pinned: Set[str] = set()
+        # Hot models unloaded for the budget; not preloaded again until the active set changes
+        self._evicted_hot: Set[str] = set()
+        self._last_active: Set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    def touch(self, model_name: str) -> None:
+        """Mark a model as in active use, starting background reconciliation if it is not running."""
+        with self._lock:
+            self._active[_model_key(model_name)] = time.monotonic()
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="ollama-residency", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Reconcile every check_interval seconds until no model is active or pinned."""
+        while True:
+            self._reconcile()
+            with self._lock:
+                if not self._active and not self._pinned:
+                    self._thread = None
+                    return
+            time.sleep(self.check_interval)
+
+    def preload(self, model_name: str) -> bool:
+        """
+        Start loading a selected model in the background, if preloading it is allowed.
+
+        Hot models are always preloaded; other models only with
+        OLLAMA_PRELOAD_SELECTED. The load is skipped if it would take Ollama
+        over the memory budget, so it never pushes out the model in use.
+
+        Returns:
+            True if a preload was started
+        """
+        key = _model_key(model_name)
+        if not (OLLAMA_PRELOAD_SELECTED or key in self.hot_models):
+            return False
+        return preload_model(model_name, should_load=self.fits_budget)
+
+    def fits_budget(self, model_name: str) -> bool:
+        """Check whether loading a model keeps Ollama within the memory budget."""
+        if not self.memory_budget:
+            return True
+        loaded = {model['name']: model for model in list_running()}
+        key = _model_key(model_name)
+        if key in loaded:
+            return True
+        return self._used_memory(loaded) + get_model_size(key) <= self.memory_budget
+
+    def _active_models(self) -> Set[str]:
+        now = time.monotonic()
+        with self._lock:
+            for name in [name for name, seen in self._active.items() if now - seen > ACTIVE_MODEL_TIMEOUT]:
+                del self._active[name]
+            return set(self._active)
+
+    def _reconcile(self) -> None:
+        try:
+            active = self._active_models()
+            if active != self._last_active:
+                self._evicted_hot.clear()
+                self._last_active = active
+            loaded = {model['name']: model for model in list_running()}
+
+            # Pin active models, loading any that Ollama evicted
+            for name in (active - self._pinned) | {name for name in active if name not in loaded}:
+                load_model(name, OLLAMA_ACTIVE_KEEP_ALIVE)
+                self._pinned.add(name)
+
+            # Models no longer in use go back to the normal expiry
+            for name in self._pinned - active:
+                if name in loaded:
+                    load_model(name, OLLAMA_KEEP_ALIVE)
+                self._pinned.discard(name)
+
+            loaded = {model['name']: model for model in list_running()}
+            self._enforce_budget(loaded, active)
+
+            for name in self.hot_models:
+                if name not in loaded and name not in self._evicted_hot and self._within_budget(loaded):
+                    load_model(name, OLLAMA_KEEP_ALIVE)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+
+    def _used_memory(self, loaded: Dict[str, dict]) -> int:
+        return sum(model.get('size', 0) for model in loaded.values())
+
+    def _within_budget(self, loaded: Dict[str, dict]) -> bool:
+        """Preload hot models only while loaded models are within the budget."""
+        return not self.memory_budget or self._used_memory(loaded) < self.memory_budget
+
+    def _enforce_budget(self, loaded: Dict[str, dict], active: Set[str]) -> None:
+        """Unload idle models until loaded models fit the memory budget."""
+        if not self.memory_budget:
+            return
+        # Idle models go first, then hot ones; soonest-expiring (least recently used) first
+        candidates = sorted(
+            (model for name, model in loaded.items() if name not in active),
+            key=lambda model: (model['name'] in self.hot_models, model.get('expires_at', ''))
+        )
+        used = self._used_memory(loaded)
+        for model in candidates:
+            if used <= self.memory_budget:
+                break
+            unload_model(model['name'])
+            if model['name'] in self.hot_models:
+                self._evicted_hot.add(model['name'])
+            used -= model.get('size', 0)
+            del loaded[model['name']]
+
+
+_manager = ResidencyManager()
+
+
+def get_residency_manager() -> ResidencyManager:
+    """Get the process-wide Ollama residency manager."""
+    return _manager
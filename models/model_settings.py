@@ -1,10 +1,14 @@
 import os
-import requests
 import streamlit as st
-import anthropic
-from langchain_ollama import OllamaLLM
-from langchain_anthropic import ChatAnthropic
-from typing import Union
+from typing import TYPE_CHECKING
+from models.llm_registry import get_llm_registry
+from models.model_catalog import get_model_catalog
+from models.ollama_api import load_model, list_running, get_num_ctx
+from models.providers import get_provider
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+    from langchain_ollama import OllamaLLM
 
 class ModelSettings:
     def __init__(self):
@@ -16,127 +20,77 @@ class ModelSettings:
     def get_running_models(self) -> list:
         """Get list of currently running Ollama models."""
         try:
-            response = requests.get('http://localhost:11434/api/ps')
-            if response.status_code == 200:
-                data = response.json()
-                if not data.get('models', []):
-                    return []
-                return sorted(list(set(model['name'] for model in data['models'])))
-            return []
-        except:
+            return sorted(list(set(model['name'] for model in list_running())))
+        except Exception:
             return []
 
+    def keep_resident(self, model_name: str) -> None:
+        """Keep a model ready in memory while it is in use."""
+        if model_name:
+            get_provider(model_name).keep_resident(model_name)
+
     def get_available_models(self) -> list:
         """Get list of available models including both Ollama and Claude."""
+        # Served from a shared cache that refreshes in the background
+        listings = get_model_catalog().get()
         models = []
-        
-        # Get Ollama models
-        try:
-            response = requests.get('http://localhost:11434/api/tags')
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('models', []):
-                    models.extend(model['name'] for model in data['models'])
-        except:
-            pass
+        for listing in listings.values():
+            models.extend(listing["models"])
             
-        # Get Claude models through the API if key is available
+        # Report Claude listing status if key is available
         if os.getenv('ANTHROPIC_API_KEY'):
-            try:
-                # Initialize Anthropic client
-                client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-                # Fetch available models
-                available_models = client.models.list()
-                for model in available_models.data:
-                    if model.id.startswith('claude'):  # Only add Claude models
-                        models.append(model.id)
-                st.sidebar.success(f"✓ Found {len(models)} Claude models")
-            except Exception as e:
-                st.sidebar.warning(f"Failed to fetch Claude models: {str(e)}")
+            claude = listings.get("claude", {"models": [], "error": None})
+            if claude["error"]:
+                st.sidebar.warning(f"Failed to fetch Claude models: {claude['error']}")
+            else:
+                st.sidebar.success(f"✓ Found {len(claude['models'])} Claude models")
                 
         return sorted(list(set(models)))
 
-    def run_model(self, model_name: str) -> Union[OllamaLLM, ChatAnthropic]:
+    def run_model(self, model_name: str) -> "BaseLanguageModel":
         """Initialize and test a model."""
         try:
-            if model_name.startswith('claude'):
-                return self._init_claude_model(model_name)
-            else:
-                return self._init_ollama_model(model_name)
+            # Readiness check only (load for Ollama, metadata for Claude), no generation
+            get_provider(model_name).prepare(model_name)
+            model = get_llm_registry().get(model_name)
+            st.success(f"Successfully started model: {model_name}")
+            return model
         except Exception as e:
             st.error(f"Error starting model: {str(e)}")
+            # The model may have been removed or its key revoked; refresh the listing on the next read
+            get_model_catalog().invalidate()
             return None
 
-    def _init_claude_model(self, model_name: str) -> ChatAnthropic:
-        """Initialize Claude model."""
-        if not os.getenv('ANTHROPIC_API_KEY'):
-            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-            
-        # Initialize single model instance with streaming
-        test_container = st.empty()
-        from models.chat_model import StreamHandler
-        stream_handler = StreamHandler(test_container)
-        
-        model = ChatAnthropic(
-            model_name=model_name,
-            temperature=0.7,
-            anthropic_api_key=os.getenv('ANTHROPIC_API_KEY'),
-            streaming=True,
-            max_tokens=1000,
-            callbacks=[stream_handler]
-        )
-        
-        # Test the model
-        from langchain_core.messages import HumanMessage
-        test_response = model.invoke([HumanMessage(content="Hello")])
-        response = test_response.content
-        st.success(f"Successfully started model: {model_name}")
-        return model
-
-    def _init_ollama_model(self, model_name: str) -> OllamaLLM:
-        """Initialize Ollama model."""
-        # Initialize model with LangChain
-        model = OllamaLLM(
-            model=model_name,
-            temperature=0.7
-        )
-        
-        # Test the model
-        test_container = st.empty()
-        from models.chat_model import StreamHandler
-        stream_handler = StreamHandler(test_container)
-        model_test = OllamaLLM(
-            model=model_name,
-            callbacks=[stream_handler],
-            temperature=0.7
-        )
-        response = model_test.invoke("Hello")
-        st.success(f"Successfully started model: {model_name}")
-        return model
+    def preload_model(self, model_name: str) -> None:
+        """Start loading a model in the background so switching to it is quick, if its provider allows it."""
+        if model_name:
+            get_provider(model_name).preload(model_name)
 
-    def setup_ollama(self, model_name: str) -> OllamaLLM:
+    def setup_ollama(self, model_name: str) -> "OllamaLLM":
         """Set up and initialize Ollama with specified model."""
+        from langchain_ollama import OllamaLLM
         try:
             print(f"Attempting to initialize Ollama with model: {model_name}")
             # Strip ':latest' suffix if present
             base_model = model_name.split(':')[0] if ':' in model_name else model_name
             model = OllamaLLM(
                 model=base_model,
-                temperature=0.7
+                temperature=0.7,
+                num_ctx=get_num_ctx(base_model)
             )
-            # Test the model with a simple prompt
-            response = model.invoke("Hello")
-            print(f"Test response received: {response[:100]}...")
+            # Load the model without running a generation
+            load_model(base_model)
+            print(f"Model loaded: {base_model}")
             return model
         except Exception as e:
             print(f"Error initializing Ollama: {str(e)}")
             raise
 
-    def get_current_model(self) -> Union[OllamaLLM, ChatAnthropic]:
+    def get_current_model(self) -> "BaseLanguageModel":
         """Get the currently loaded model."""
         return st.session_state.current_llm
 
-    def set_current_model(self, model: Union[OllamaLLM, ChatAnthropic], model_name: str):
+    def set_current_model(self, model: "BaseLanguageModel", model_name: str):
         """Set the current model and update session state."""
         st.session_state.current_llm = model
         st.session_state.last_model = model_name
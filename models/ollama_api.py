@@ -0,0 +1,122 @@
+import os
+import threading
+import requests
+from typing import Set, List, Dict, Any, Union, Callable, Optional
+from models.model_catalog import OLLAMA_BASE_URL
+from models.prompt_builder import get_context_window
+
+
+def parse_keep_alive(value: str) -> Union[int, str]:
+    """Convert a keep_alive setting to what Ollama expects: seconds as a number, or a duration like '30m'."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+# How long Ollama keeps a model in memory after its last request
+OLLAMA_KEEP_ALIVE = parse_keep_alive(os.getenv('OLLAMA_KEEP_ALIVE', '30m'))
+
+# keep_alive for the model a session is actively chatting with; -1 keeps it loaded until unloaded
+OLLAMA_ACTIVE_KEEP_ALIVE = parse_keep_alive(os.getenv('OLLAMA_ACTIVE_KEEP_ALIVE', '-1'))
+
+# Largest context Ollama is asked to allocate; prompts are budgeted against the same window
+OLLAMA_NUM_CTX = int(os.getenv('OLLAMA_NUM_CTX', '8192'))
+
+OLLAMA_STATUS_TIMEOUT = 2.0
+
+# Loading weights from disk can take a while for large models
+OLLAMA_LOAD_TIMEOUT = 300.0
+
+# Shared session so requests reuse connections to the Ollama server
+_session = requests.Session()
+
+_preloading: Set[str] = set()
+_preloading_lock = threading.Lock()
+
+
+def get_num_ctx(model_name: str) -> int:
+    """
+    Get the context size a model is served with.
+
+    Every request for a model must send the same num_ctx, or Ollama reloads it.
+    """
+    return min(get_context_window(model_name), OLLAMA_NUM_CTX)
+
+
+def load_model(model_name: str, keep_alive: Union[int, str] = OLLAMA_KEEP_ALIVE) -> None:
+    """
+    Load a model into memory without generating anything.
+
+    A generate request with no prompt only loads the model, so this returns
+    once it is ready to serve, in roughly the model's load time.
+    """
+    response = _session.post(
+        f'{OLLAMA_BASE_URL}/api/generate',
+        json={"model": model_name, "keep_alive": keep_alive, "options": {"num_ctx": get_num_ctx(model_name)}},
+        timeout=OLLAMA_LOAD_TIMEOUT
+    )
+    if response.status_code != 200:
+        try:
+            error = response.json().get('error', response.text)
+        except ValueError:
+            error = response.text
+        raise RuntimeError(f"Ollama could not load {model_name}: {error}")
+
+
+def preload_model(model_name: str, keep_alive: Union[int, str] = OLLAMA_KEEP_ALIVE,
+                  should_load: Optional[Callable[[str], bool]] = None) -> bool:
+    """
+    Load a model in the background.
+
+    Args:
+        should_load: Checked on the background thread before loading; the preload is skipped if it returns False
+
+    Returns:
+        False if a preload for the model is already running
+    """
+    with _preloading_lock:
+        if model_name in _preloading:
+            return False
+        _preloading.add(model_name)
+
+    def run():
+        try:
+            if should_load is None or should_load(model_name):
+                load_model(model_name, keep_alive)
+        except Exception:
+            # Preloading is best-effort; a real switch reports the error
+            pass
+        finally:
+            with _preloading_lock:
+                _preloading.discard(model_name)
+
+    threading.Thread(target=run, name=f"ollama-preload-{model_name}", daemon=True).start()
+    return True
+
+
+def get_model_size(model_name: str) -> int:
+    """Get an installed model's size in bytes, or 0 if it is unknown."""
+    response = _session.get(f'{OLLAMA_BASE_URL}/api/tags', timeout=OLLAMA_STATUS_TIMEOUT)
+    response.raise_for_status()
+    for model in response.json().get('models', []) or []:
+        if model.get('name') == model_name:
+            return model.get('size', 0)
+    return 0
+
+
+def list_running() -> List[Dict[str, Any]]:
+    """List models currently loaded in Ollama, with their memory use and expiry."""
+    response = _session.get(f'{OLLAMA_BASE_URL}/api/ps', timeout=OLLAMA_STATUS_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get('models', []) or []
+
+
+def unload_model(model_name: str) -> None:
+    """Unload a model from memory."""
+    response = _session.post(
+        f'{OLLAMA_BASE_URL}/api/generate',
+        json={"model": model_name, "keep_alive": 0},
+        timeout=OLLAMA_STATUS_TIMEOUT
+    )
+    response.raise_for_status()
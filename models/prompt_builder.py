@@ -0,0 +1,211 @@
+import math
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Callable, Tuple
+
+# Context windows in tokens, matched by model name prefix (longest prefix wins)
+MODEL_CONTEXT_WINDOWS = {
+    "claude": 200_000,
+    "llama3.1": 128_000,
+    "llama3.2": 128_000,
+    "llama3": 8_192,
+    "llama2": 4_096,
+    "mistral": 32_768,
+    "mixtral": 32_768,
+    "gemma2": 8_192,
+    "gemma": 8_192,
+    "qwen2": 32_768,
+    "phi3": 4_096,
+}
+
+# Ollama serves models with a small context unless num_ctx is raised, so unknown
+# models get a conservative window
+DEFAULT_CONTEXT_WINDOW = 4_096
+
+# Tokens kept free for the model's answer
+DEFAULT_OUTPUT_RESERVE = 1_024
+
+# Upper bound on prompt size regardless of window, to keep latency and cost predictable
+MAX_PROMPT_TOKENS = 8_000
+
+# Remaining items are dropped rather than truncated below this many tokens
+MIN_PARTIAL_TOKENS = 50
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_context_window(model_name: str) -> int:
+    """Get the context window for a model by its name."""
+    name = (model_name or "").lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+@dataclass
+class PromptSection:
+    """
+    A named part of the prompt.
+
+    Required sections are always included in full. Optional sections share
+    the remaining budget: each first gets up to its share, then leftover
+    budget is handed out by priority (lower number first).
+    """
+    name: str
+    items: List[str]
+    priority: int = 0
+    required: bool = False
+    share: float = 1.0
+    header: Optional[str] = None
+    keep_newest: bool = False
+    included: List[str] = field(default_factory=list)
+    tokens: int = 0
+    truncated: bool = False
+
+
+class PromptBuilder:
+    """
+    Assembles a prompt from sections within a token budget.
+
+    The budget is the model's context window minus a reserve for the answer,
+    capped at max_prompt_tokens.
+    """
+
+    def __init__(self, model_name: str, max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+                 output_reserve: int = DEFAULT_OUTPUT_RESERVE, context_window: Optional[int] = None,
+                 token_counter: Callable[[str], int] = estimate_tokens):
+        self.model_name = model_name
+        self.context_window = context_window or get_context_window(model_name)
+        self.budget = max(0, min(self.context_window - output_reserve, max_prompt_tokens))
+        self.count_tokens = token_counter
+        self.sections: List[PromptSection] = []
+
+    def add_section(self, name: str, content, priority: int = 0, required: bool = False,
+                    share: float = 1.0, header: Optional[str] = None, keep_newest: bool = False) -> "PromptBuilder":
+        """
+        Add a section to the prompt.
+
+        Args:
+            name: Section name, used in the build report
+            content: A string, or a list of items that are kept or dropped individually
+            priority: Order in which optional sections receive leftover budget
+            required: Always include in full, ahead of optional sections
+            share: Fraction of the optional budget this section may use in the first pass
+            header: Text placed before the section's items when any are included
+            keep_newest: Keep the last items of the list first (e.g. recent conversation turns)
+        """
+        items = [content] if isinstance(content, str) else list(content or [])
+        items = [item for item in items if item]
+        if items:
+            self.sections.append(PromptSection(
+                name=name, items=items, priority=priority, required=required,
+                share=share, header=header, keep_newest=keep_newest
+            ))
+        return self
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to roughly max_tokens."""
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        cut = text[:max(0, max_tokens * CHARS_PER_TOKEN - 3)]
+        while cut and self.count_tokens(cut + "...") > max_tokens:
+            cut = cut[:int(len(cut) * 0.9)]
+        return cut + "..." if cut else ""
+
+    def _fill(self, section: PromptSection, allowance: int) -> int:
+        """Add items to a section within an allowance and return the tokens used."""
+        used = 0
+        items = list(reversed(section.items)) if section.keep_newest else list(section.items)
+        remaining_items = items[len(section.included):]
+        if not section.included and section.header:
+            header_tokens = self.count_tokens(section.header)
+            if header_tokens >= allowance:
+                return 0
+            used += header_tokens
+
+        added = []
+        for item in remaining_items:
+            item_tokens = self.count_tokens(item)
+            if used + item_tokens <= allowance:
+                added.append(item)
+                used += item_tokens
+                continue
+            # Truncate the first item that does not fit, if enough room is left
+            room = allowance - used
+            if room >= MIN_PARTIAL_TOKENS:
+                partial = self._truncate(item, room)
+                added.append(partial)
+                used += self.count_tokens(partial)
+                section.truncated = True
+            break
+
+        if not added:
+            return 0
+        section.included.extend(added)
+        section.tokens += used
+        return used
+
+    def build(self) -> Tuple[str, Dict[str, int]]:
+        """
+        Build the prompt.
+
+        Returns:
+            Tuple of (prompt, report) where report maps section names to the tokens
+            they use, plus 'total' and 'budget'
+        """
+        for section in self.sections:
+            section.included = []
+            section.tokens = 0
+            section.truncated = False
+
+        remaining = self.budget
+        for section in self.sections:
+            if section.required:
+                section.included = list(section.items)
+                section.tokens = sum(self.count_tokens(item) for item in section.items)
+                if section.header:
+                    section.tokens += self.count_tokens(section.header)
+                remaining -= section.tokens
+
+        optional = sorted((s for s in self.sections if not s.required), key=lambda s: s.priority)
+        if remaining > 0 and optional:
+            # First pass: each section gets up to its share of the optional budget
+            pool = remaining
+            for section in optional:
+                remaining -= self._fill(section, min(remaining, int(pool * section.share)))
+            # Second pass: leftover budget goes to sections in priority order
+            for section in optional:
+                if remaining <= 0:
+                    break
+                if section.truncated:
+                    # Drop the truncated last item so it can be refilled with more room
+                    freed = self.count_tokens(section.included.pop())
+                    section.tokens -= freed
+                    remaining += freed
+                    section.truncated = False
+                    if not section.included and section.header:
+                        freed = self.count_tokens(section.header)
+                        section.tokens -= freed
+                        remaining += freed
+                remaining -= self._fill(section, remaining)
+
+        parts = []
+        for section in self.sections:
+            if not section.included:
+                continue
+            items = list(reversed(section.included)) if section.keep_newest else section.included
+            text = "\n\n".join(items)
+            parts.append(f"{section.header}\n\n{text}" if section.header else text)
+
+        report = {section.name: section.tokens for section in self.sections}
+        report["total"] = sum(section.tokens for section in self.sections)
+        report["budget"] = self.budget
+        return "\n\n".join(parts), report
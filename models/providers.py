@@ -0,0 +1,153 @@
+import os
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from models.model_catalog import OLLAMA_BASE_URL, list_ollama_models, list_claude_models, check_claude_model
+from models.prompt_builder import DEFAULT_CONTEXT_WINDOW
+from models.ollama_api import load_model, get_num_ctx, OLLAMA_ACTIVE_KEEP_ALIVE
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+
+DEFAULT_TEMPERATURE = 0.7
+
+
+class Provider:
+    """
+    An LLM backend.
+
+    Client libraries are imported inside the methods that need them, so a
+    provider that is never used costs nothing at startup.
+    """
+    name = ""
+    # Temperature used for chat turns
+    chat_temperature = DEFAULT_TEMPERATURE
+    # Module prefix of the provider's LangChain client classes
+    client_module = ""
+
+    def handles(self, model_name: str) -> bool:
+        """Check whether a model name belongs to this provider."""
+        raise NotImplementedError
+
+    def owns(self, llm: Any) -> bool:
+        """Check whether a client was created by this provider, without importing its library."""
+        return type(llm).__module__.startswith(self.client_module)
+
+    def create_client(self, model_name: str, temperature: float) -> "BaseLanguageModel":
+        raise NotImplementedError
+
+    def model_name(self, llm: "BaseLanguageModel") -> str:
+        return getattr(llm, "model", "") or ""
+
+    def context_window(self, llm: "BaseLanguageModel") -> Optional[int]:
+        """Get the context size a client is served with, or None to look it up by model name."""
+        return None
+
+    def list_models(self) -> List[str]:
+        return []
+
+    def prepare(self, model_name: str) -> None:
+        """Make a model ready to serve requests."""
+
+    def preload(self, model_name: str) -> None:
+        """Start making a model ready in the background."""
+
+    def keep_resident(self, model_name: str) -> None:
+        """Keep a model ready while it is in use."""
+
+    def invoke(self, llm: "BaseLanguageModel", prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+        """Run a prompt and return the response text."""
+        return llm.invoke(prompt, config=config)
+
+
+class OllamaProvider(Provider):
+    name = "ollama"
+    chat_temperature = 0.6
+    client_module = "langchain_ollama"
+
+    def handles(self, model_name: str) -> bool:
+        return not model_name.startswith('claude')
+
+    def create_client(self, model_name: str, temperature: float) -> "BaseLanguageModel":
+        from langchain_ollama import OllamaLLM
+        # Chat requests carry the pinned keep_alive so they never shorten a model's residency.
+        # num_ctx is set explicitly so prompts are budgeted against the context Ollama
+        # actually allocates rather than the model's advertised window
+        return OllamaLLM(
+            model=model_name,
+            temperature=temperature,
+            base_url=OLLAMA_BASE_URL,
+            keep_alive=OLLAMA_ACTIVE_KEEP_ALIVE,
+            num_ctx=get_num_ctx(model_name)
+        )
+
+    def context_window(self, llm: "BaseLanguageModel") -> Optional[int]:
+        # Without num_ctx Ollama uses its small default, whatever the model supports
+        return getattr(llm, "num_ctx", None) or DEFAULT_CONTEXT_WINDOW
+
+    def list_models(self) -> List[str]:
+        return list_ollama_models()
+
+    def prepare(self, model_name: str) -> None:
+        # Load the weights without running a generation
+        load_model(model_name)
+
+    def preload(self, model_name: str) -> None:
+        from models.model_residency import get_residency_manager
+        get_residency_manager().preload(model_name)
+
+    def keep_resident(self, model_name: str) -> None:
+        from models.model_residency import get_residency_manager
+        get_residency_manager().touch(model_name)
+
+
+class ClaudeProvider(Provider):
+    name = "claude"
+    client_module = "langchain_anthropic"
+    max_tokens = 1000
+
+    def handles(self, model_name: str) -> bool:
+        return model_name.startswith('claude')
+
+    def create_client(self, model_name: str, temperature: float) -> "BaseLanguageModel":
+        if not os.getenv('ANTHROPIC_API_KEY'):
+            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(
+            model_name=model_name,
+            temperature=temperature,
+            anthropic_api_key=os.getenv('ANTHROPIC_API_KEY'),
+            streaming=True,
+            max_tokens=self.max_tokens
+        )
+
+    def list_models(self) -> List[str]:
+        return list_claude_models()
+
+    def prepare(self, model_name: str) -> None:
+        if not os.getenv('ANTHROPIC_API_KEY'):
+            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+        # Check the model exists and the key can use it, without running a generation
+        check_claude_model(model_name)
+
+    def invoke(self, llm: "BaseLanguageModel", prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+        from langchain_core.messages import HumanMessage
+        return llm.invoke([HumanMessage(content=prompt)], config=config).content
+
+
+# Checked in order; the first provider that handles a model name wins
+PROVIDERS: List[Provider] = [ClaudeProvider(), OllamaProvider()]
+
+
+def get_provider(model_name: str) -> Provider:
+    """Get the provider serving a model name."""
+    for provider in PROVIDERS:
+        if provider.handles(model_name):
+            return provider
+    raise ValueError(f"No provider for model: {model_name}")
+
+
+def provider_for_client(llm: Any) -> Provider:
+    """Get the provider that created a client."""
+    for provider in PROVIDERS:
+        if provider.owns(llm):
+            return provider
+    raise ValueError(f"No provider for client: {type(llm).__name__}")
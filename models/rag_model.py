@@ -1,8 +1,11 @@
 import os
-from typing import Optional, List, Dict, Any
-from rag_app.chroma_store import ChromaStore
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
+from models.shared_resources import get_chroma_store
 import streamlit as st
 
+if TYPE_CHECKING:
+    from rag_app.chroma_store import ChromaStore
+
 class RagModel:
     def __init__(self):
         """Initialize RAG model with disabled state."""
@@ -10,17 +13,18 @@ class RagModel:
             st.session_state.rag_enabled = False
         if 'rag_n_results' not in st.session_state:
             st.session_state.rag_n_results = 3
-        self.chroma_store: Optional[ChromaStore] = None
+        self.chroma_store: Optional["ChromaStore"] = None
 
     def initialize_rag(self) -> None:
-        """Initialize ChromaDB connection."""
+        """Connect to the shared ChromaDB store."""
         try:
             # Get the absolute path to the rag_app directory
             rag_app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'rag_app'))
             data_dir = os.path.join(rag_app_dir, "data")
             persist_directory = os.path.join(data_dir, "chroma_db")
             
-            self.chroma_store = ChromaStore(persist_directory=persist_directory)
+            # Shared across sessions and reruns instead of rebuilt on every rerun
+            self.chroma_store = get_chroma_store(persist_directory)
             return True
         except Exception as e:
             st.error(f"Failed to initialize RAG database: {str(e)}")
@@ -31,8 +35,10 @@ class RagModel:
         return st.session_state.rag_enabled
 
     def set_enabled(self, enabled: bool) -> None:
-        """Enable or disable RAG functionality."""
+        """Enable or disable RAG functionality, connecting to the database on first enable."""
         st.session_state.rag_enabled = enabled
+        if enabled and not self.chroma_store:
+            self.initialize_rag()
 
     def set_n_results(self, n: int) -> None:
         """Set number of RAG results to return."""
@@ -51,35 +57,42 @@ class RagModel:
         except Exception:
             return {"total_documents": 0}
 
-    def get_rag_context(self, query: str) -> Optional[str]:
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get query cache statistics from the document store."""
+        if not self.chroma_store:
+            return {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0}
+        return self.chroma_store.get_cache_stats()
+
+    def get_rag_context_parts(self, query: str, n_results: int) -> Tuple[Optional[List[str]], Optional[Tuple[str, str]]]:
         """
-        Retrieve relevant documents for a query and format them as context.
+        Retrieve relevant documents for a query and format each one as context.
+        
+        Does not touch Streamlit, so it can run on a worker thread; read
+        n_results on the script thread and pass any notice to show_notice there.
         
         Args:
             query: The user's query text
+            n_results: Number of documents to retrieve
             
         Returns:
-            Formatted context string or None if RAG is disabled or no results found
+            Tuple of (context parts, notice): the formatted documents, best first,
+            or None if there are none, and an optional (level, message) to show
+            the user, where level is 'info', 'warning' or 'error'
         """
-        if not self.is_enabled():
-            return None
-            
         if not self.chroma_store:
-            st.warning("RAG is enabled but the database connection is not initialized.")
-            return None
+            return None, ("warning", "RAG is enabled but the database connection is not initialized.")
 
         try:
             results = self.chroma_store.query_documents(
                 query_text=query,
-                n_results=self.get_n_results(),
+                n_results=n_results,
                 include_fields=["documents", "metadatas"]
             )
 
             if not results:
-                st.info("No relevant documents found in the RAG database for this query.")
-                return None
+                return None, ("info", "No relevant documents found in the RAG database for this query.")
 
-            # Format results into context string with relevance information
+            # Format results into context strings with relevance information
             context_parts = []
             for i, result in enumerate(results, 1):
                 # Start with document header and metadata
@@ -105,11 +118,14 @@ class RagModel:
                 
                 context_parts.append("\n".join(context_parts_doc))
 
-            if context_parts:
-                header = f"RAG Context (showing top {len(results)} relevant documents):"
-                return header + "\n\n" + "\n\n".join(context_parts)
-            return None
+            return context_parts or None, None
 
         except Exception as e:
-            st.error(f"Error retrieving RAG context: {str(e)}")
-            return None
+            return None, ("error", f"Error retrieving RAG context: {str(e)}")
+
+    def show_notice(self, notice: Optional[Tuple[str, str]]) -> None:
+        """Show a notice returned by get_rag_context_parts; call from the script thread."""
+        if notice:
+            level, message = notice
+            getattr(st, level)(message)
+
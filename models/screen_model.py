@@ -1,6 +1,6 @@
-import requests
-from bs4 import BeautifulSoup
 import streamlit as st
+from models.html_extractor import get_extractor
+from models.web_cache import get_web_cache
 
 class ScreenModel:
     def __init__(self):
@@ -16,24 +16,10 @@ class ScreenModel:
             if not url.startswith(('http://', 'https://')):
                 url = 'https://' + url
                 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            # Get text and clean it up
-            text = soup.get_text(separator='\n', strip=True)
-            
-            # Clean up excessive newlines
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            text = '\n'.join(lines)
+            # Main content is extracted with the fastest installed parser;
+            # unchanged pages are revalidated and served from the on-disk cache
+            extractor = get_extractor()
+            text = get_web_cache().fetch_text(url, extractor.extract, extractor_id=extractor.id)
             
             # Update session state
             st.session_state.webpage_content = text
@@ -0,0 +1,49 @@
+import time
+import streamlit as st
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rag_app.chroma_store import ChromaStore
+
+# Minimum seconds between health checks of a shared resource
+HEALTH_CHECK_INTERVAL = 30.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_function():
+    """Load the embedding model once per process."""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def _chroma_store_is_healthy(store: "ChromaStore") -> bool:
+    """
+    Validate the shared store, checking Chroma at most every HEALTH_CHECK_INTERVAL seconds.
+
+    Changes written by another process, such as the ingestion app, are picked up here first.
+    """
+    try:
+        store.refresh()
+    except Exception:
+        return False
+    now = time.monotonic()
+    if now - getattr(store, "_last_health_check", 0.0) < HEALTH_CHECK_INTERVAL:
+        return True
+    store._last_health_check = now
+    return store.heartbeat()
+
+
+@st.cache_resource(show_spinner="Connecting to the document database...", validate=_chroma_store_is_healthy)
+def get_chroma_store(persist_directory: str) -> "ChromaStore":
+    """
+    Get the ChromaStore for a directory, shared by every session and rerun.
+
+    The client, collection, caches and embedding model are created once per
+    process and reloaded when another process changes the store. A store that
+    fails its health check is dropped and rebuilt on the next access; a failed construction is not cached, so it is retried.
+    """
+    # Imported here so chromadb only loads once RAG is used
+    from rag_app.chroma_store import ChromaStore
+    store = ChromaStore(persist_directory=persist_directory, embedding_function=get_embedding_function())
+    store._last_health_check = time.monotonic()
+    return store
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Any, Optional
+
+DEFAULT_WEB_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'web_cache'))
+
+# Entries beyond this many, or unused for longer than this, are evicted least recently used first
+MAX_CACHE_ENTRIES = 500
+MAX_CACHE_AGE = 30 * 24 * 3600
+
+REQUEST_TIMEOUT = 10
+POOL_SIZE = 10
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+def create_session() -> requests.Session:
+    """Create a session with pooled, reusable connections for page fetches."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+
+class WebPageCache:
+    """
+    On-disk cache of extracted webpage text, keyed by URL.
+
+    Each entry stores the extracted text with the response's ETag and
+    Last-Modified validators. Later fetches send a conditional GET and reuse
+    the cached text on 304 Not Modified, skipping both the download and the
+    HTML parse. Entries are tied to the extractor that produced them, so a
+    changed extractor never serves old text. Responses marked no-store are
+    never cached, and the cache keeps at most max_entries entries, dropping
+    the least recently used ones and any unused for max_age seconds.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_WEB_CACHE_DIR, session: Optional[requests.Session] = None,
+                 max_entries: int = MAX_CACHE_ENTRIES, max_age: float = MAX_CACHE_AGE):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.session = session or create_session()
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.stats = {"fetched": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the cached entry for a URL, if any, marking it as recently used."""
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("url") != url:
+                return None
+            # The file's mtime records when the entry was last used, for eviction
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: Dict[str, Any]) -> None:
+        """Atomically write the cached entry for a URL."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({**entry, "url": url}, f)
+            os.replace(tmp_path, self._path(url))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then the least recently used ones beyond max_entries."""
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if now - mtime > self.max_age:
+                    os.remove(path)
+                else:
+                    entries.append((mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def fetch_text(self, url: str, extract: Callable[[str], str], extractor_id: str = "") -> str:
+        """
+        Get the extracted text of a page, revalidating any cached copy.
+
+        Args:
+            url: Page URL
+            extract: Function turning the page's HTML into text
+            extractor_id: Identifies the extraction method; cached text from another method is ignored
+
+        Returns:
+            Extracted page text
+        """
+        entry = self.get(url)
+        if entry is not None and entry.get("extractor") != extractor_id:
+            entry = None
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return entry["text"]
+        response.raise_for_status()
+
+        text = extract(response.text)
+        with self._lock:
+            self.stats["fetched"] += 1
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        no_store = "no-store" in response.headers.get("Cache-Control", "").lower()
+        # Without validators the page cannot be revalidated, so there is nothing to reuse
+        if (etag or last_modified) and not no_store:
+            try:
+                self.put(url, {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "extractor": extractor_id,
+                    "text": text,
+                    "fetched_at": time.time()
+                })
+            except OSError:
+                pass
+        elif no_store:
+            try:
+                os.remove(self._path(url))
+            except OSError:
+                pass
+        return text
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+_cache: Optional[WebPageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_web_cache() -> WebPageCache:
+    """Get the process-wide webpage cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = WebPageCache()
+        return _cache
@@ -12,32 +12,33 @@ def initialize_document_loader():
 
 def document_management(doc_loader):
     st.header("Document Loading")
+    rebuild = st.checkbox(
+        "Rebuild index from scratch",
+        value=False,
+        help="Drop the collection and re-embed every document instead of only new or changed files"
+    )
     if st.button("Load Documents", key="load_documents_button"):
         with st.spinner("Loading documents..."):
             try:
-                # Load documents and get chunks
-                documents, chunks = doc_loader.load_documents()
+                if rebuild:
+                    doc_loader.reset_index()
+                    
+                # Only new or changed files are embedded; removed files are dropped
+                summary = doc_loader.ingest()
                 
-                if documents:
-                    # Clear existing collection
-                    collection_name = "documents"
-                    try:
-                        doc_loader.chroma_store.client.delete_collection(name=collection_name)
-                    except Exception:
-                        pass  # Collection might not exist yet
-                        
-                    # Create fresh collection
-                    doc_loader.chroma_store.collection = doc_loader.chroma_store.client.create_collection(
-                        name=collection_name,
-                        metadata={"hnsw:space": "cosine"}
+                if summary["processed_files"] or summary["removed_files"]:
+                    st.success(
+                        f"Processed {summary['processed_files']} files, added {summary['added_chunks']} chunks "
+                        f"and removed {summary['removed_files']} deleted files"
                     )
-                    
-                    # Add chunks to collection
-                    doc_loader.chroma_store.add_documents(chunks)
-                    
-                    st.success(f"Successfully loaded {len(documents)} documents and created {len(chunks)} chunks")
                 else:
                     st.info("No new documents found to process")
+                if summary["failed_files"]:
+                    st.warning(f"{summary['failed_files']} files produced no chunks")
+                if doc_loader.last_metrics and doc_loader.last_metrics.files:
+                    with st.expander("Ingestion metrics"):
+                        st.json(summary["metrics"])
+                        st.dataframe([m.to_dict() for m in doc_loader.last_metrics.files.values()])
             except Exception as e:
                 st.error(f"Error loading documents: {str(e)}")
 
@@ -48,6 +49,11 @@ def collection_management(doc_loader):
     try:
         stats = doc_loader.chroma_store.get_collection_stats()
         st.metric("Total Documents in Collection", stats["total_documents"])
+        cache_stats = doc_loader.chroma_store.get_cache_stats()
+        st.caption(
+            f"Query cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
     except Exception as e:
         st.error(f"Error getting collection stats: {str(e)}")
     
@@ -75,7 +81,7 @@ def collection_management(doc_loader):
                 with col2:
                     if st.button("Delete", key=f"delete_{name}"):
                         try:
-                            doc_loader.chroma_store.client.delete_collection(name=name)
+                            doc_loader.chroma_store.delete_collection(name=name)
                             st.success(f"Deleted collection: {name}")
                             st.rerun()
                         except Exception as e:
@@ -159,7 +165,7 @@ def query_rag(doc_loader):
                                 st.markdown("**Embedding:**")
                                 st.write(f"Vector dimension: {len(result['embedding'])}")
                                 if st.checkbox(f"Show full embedding vector for result {i}", key=f"show_embedding_{i}"):
-                                    st.json(result["embedding"])
+                                    st.json(result["embedding"].tolist())
                 else:
                     st.info("No matching documents found")
                     
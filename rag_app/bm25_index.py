@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import math
+import heapq
+import logging
+import tempfile
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple, Iterable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Very common words carry no lexical signal and bloat the postings lists
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its of on or
+that the their there these this to was were what when where which who why will with
+you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into word tokens, dropping stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    The index stores per-document term counts and persists them as JSON;
+    postings lists and length statistics are rebuilt in memory on load.
+    All operations are guarded by a lock so queries can run while ingestion
+    updates the index.
+    """
+
+    def __init__(self, index_path: str, k1: float = 1.5, b: float = 0.75):
+        self.index_path = os.path.abspath(index_path)
+        self.k1 = k1
+        self.b = b
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _index_document(self, doc_id: str, term_counts: Dict[str, int]) -> None:
+        self._doc_terms[doc_id] = term_counts
+        length = sum(term_counts.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def _unindex_document(self, doc_id: str) -> None:
+        term_counts = self._doc_terms.pop(doc_id, None)
+        if term_counts is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        for term in term_counts:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, doc_ids: Iterable[str], texts: Iterable[str]) -> None:
+        """Add or replace documents in the index."""
+        with self._lock:
+            for doc_id, text in zip(doc_ids, texts):
+                self._unindex_document(doc_id)
+                self._index_document(doc_id, dict(Counter(tokenize(text or ""))))
+            self._dirty = True
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        """Remove documents from the index."""
+        with self._lock:
+            for doc_id in doc_ids:
+                self._unindex_document(doc_id)
+            self._dirty = True
+
+    def clear(self) -> None:
+        """Remove every document from the index."""
+        with self._lock:
+            self._doc_terms = {}
+            self._postings = {}
+            self._doc_lengths = {}
+            self._total_length = 0
+            self._dirty = True
+
+    def search(self, query_text: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Score documents against a query.
+
+        Returns:
+            Up to k (document ID, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query_text))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not terms or not n_docs or k <= 0:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def load(self) -> None:
+        """Load the index from disk, starting empty if it is missing or unreadable."""
+        with self._lock:
+            self.clear()
+            self._dirty = False
+            if not os.path.exists(self.index_path):
+                return
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for doc_id, term_counts in data.get("documents", {}).items():
+                    self._index_document(doc_id, term_counts)
+            except Exception as e:
+                logger.error(f"Error reading BM25 index {self.index_path}: {str(e)}")
+                self.clear()
+
+    def save(self) -> None:
+        """Atomically write the index to disk if it has changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.index_path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"documents": self._doc_terms}, f)
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
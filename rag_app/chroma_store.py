@@ -1,19 +1,152 @@
 import os
 import time
+import uuid
+import hashlib
+import tempfile
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional, Callable
 from langchain.docstore.document import Document
+try:
+    from bm25_index import BM25Index
+    from embedding_cache import CachedEmbeddingFunction
+    from reranker import Reranker
+except ImportError:
+    from rag_app.bm25_index import BM25Index
+    from rag_app.embedding_cache import CachedEmbeddingFunction
+    from rag_app.reranker import Reranker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Extra candidates fetched per query to make up for chunks removed by filtering
+QUERY_FILTER_HEADROOM = 5
+
+# Page size used when rebuilding the lexical index from the collection
+LEXICAL_REBUILD_PAGE_SIZE = 1000
+
+# How many times a query widens its candidate pool when filtering leaves too few results
+QUERY_MAX_FETCH_ROUNDS = 3
+
+# Number of chunks embedded and written per Chroma call when streaming writes
+DEFAULT_WRITE_BATCH_SIZE = 256
+
+# File next to the Chroma directory that changes whenever any process modifies the store
+GENERATION_FILE_NAME = "chroma_generation"
+
+# Query result cache defaults
+DEFAULT_QUERY_CACHE_SIZE = 128
+DEFAULT_QUERY_CACHE_TTL = 300.0
+
+def make_chunk_id(doc: Document) -> str:
+    """
+    Build a deterministic ID for a chunk.
+    
+    The ID is derived from the source file's key, page, chunk index and a hash of
+    the chunk content, so the same chunk always maps to the same ID regardless of
+    when it is ingested or whether the file has moved to the completed folder.
+    The key is the source_key metadata set during ingestion (the file's path
+    relative to the data directory), falling back to the source file name.
+    """
+    metadata = doc.metadata if hasattr(doc, 'metadata') and doc.metadata else {}
+    source = metadata.get('source_document') or metadata.get('source') or ''
+    source_key = metadata.get('source_key') or os.path.basename(str(source))
+    page = metadata.get('page', '')
+    chunk_index = metadata.get('chunk_index', '')
+    content_hash = hashlib.sha256(doc.page_content.encode('utf-8')).hexdigest()
+    key = f"{source_key}|{page}|{chunk_index}|{content_hash}"
+    return "chunk_" + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with a time-to-live for query results.
+    
+    Keys include the store's on-disk generation and collection version, so
+    entries written before a change to the collection, by this process or
+    another, can never be returned afterwards.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_QUERY_CACHE_SIZE, ttl: float = DEFAULT_QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    @staticmethod
+    def make_key(generation: str, version: int, query_text: str, n_results: int, include: List[str]) -> Tuple:
+        """Build a cache key from the store generation, collection version and normalized query parameters."""
+        normalized = " ".join(query_text.lower().split())
+        return (generation, version, normalized, n_results, tuple(sorted(include)))
+        
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Get cached results, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return [dict(result) for result in entry[1]]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+            
+    def put(self, key: Tuple, results: List[Dict[str, Any]]) -> None:
+        """Store results, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries)
+            }
+
 class ChromaStore:
-    def __init__(self, persist_directory: str = "chroma_db"):
-        """Initialize the Chroma database client."""
+    def __init__(self, persist_directory: str = "chroma_db",
+                 query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE,
+                 query_cache_ttl: float = DEFAULT_QUERY_CACHE_TTL,
+                 embedding_cache: bool = True,
+                 reranker: Optional[Reranker] = None,
+                 hybrid: bool = True,
+                 embedding_function: Optional[Any] = None):
+        """
+        Initialize the Chroma database client.
+        
+        Args:
+            persist_directory: Directory where Chroma persists its data
+            query_cache_size: Maximum number of cached query results (0 disables caching)
+            query_cache_ttl: Seconds before a cached query result expires
+            embedding_cache: Cache embeddings on disk next to the Chroma directory
+            reranker: Filtering and boost configuration for query results
+            hybrid: Fuse vector results with a local BM25 index kept in sync with the collection
+            embedding_function: Embedding function to use instead of loading Chroma's default
+                model, so one loaded model can be shared between stores
+        """
         # Convert to absolute path
         self.persist_directory = os.path.abspath(persist_directory)
         
@@ -21,76 +154,512 @@ class ChromaStore:
         if not os.path.exists(self.persist_directory):
             os.makedirs(self.persist_directory)
             
-        # Initialize Chroma client with persistence
-        self.client = chromadb.Client(Settings(
+        # Initialize embedding function
+        self.base_embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        
+        # Embeddings are computed here and passed to Chroma explicitly, so the
+        # on-disk cache can skip inference for texts embedded before. The
+        # collection keeps the plain function so its stored configuration is unchanged.
+        if embedding_cache:
+            cache_path = os.path.join(os.path.dirname(self.persist_directory), "embedding_cache.sqlite3")
+            self.embedding_function = CachedEmbeddingFunction(self.base_embedding_function, cache_path)
+        else:
+            self.embedding_function = self.base_embedding_function
+        
+        # Initialize Chroma client with persistence and create or get the collection
+        self.client, self._system, self.collection = self._connect()
+        
+        # Serializes writes and collection swaps when the store is shared between threads
+        self._write_lock = threading.RLock()
+        
+        # Queries in flight per Chroma system, so a system replaced by refresh()
+        # is only stopped once the queries still using it have finished
+        self._readers_lock = threading.Lock()
+        self._readers: Dict[int, int] = {}
+        
+        # Bumped on every write so cached query results never go stale. Each write
+        # operation also publishes a new generation to disk once it finishes, so
+        # processes sharing the directory (the chat app and the ingestion app) can
+        # tell when to reload without reloading after every batch.
+        self.version = 0
+        self.generation_path = os.path.join(os.path.dirname(self.persist_directory), GENERATION_FILE_NAME)
+        self.generation = self._read_generation()
+        self.query_cache = QueryCache(max_size=query_cache_size, ttl=query_cache_ttl)
+        self.reranker = reranker or Reranker()
+        
+        # Lexical index kept in sync with every write, delete and reset
+        self.lexical_index = None
+        if hybrid:
+            self.lexical_index = BM25Index(os.path.join(os.path.dirname(self.persist_directory), "bm25_index.json"))
+            self._ensure_lexical_index(self.lexical_index, self.collection)
+        
+        logger.info(f"Initialized ChromaStore with persistence at {persist_directory}")
+        
+    def _connect(self) -> Tuple[Any, Any, Any]:
+        """
+        Create a Chroma client and open the document collection.
+        
+        Returns:
+            Tuple of (client, system, collection); the system is the client's
+            shared Chroma instance, captured now because the client looks it up
+            in a process-wide cache that refresh() clears
+        """
+        client = chromadb.Client(Settings(
             persist_directory=self.persist_directory,
             anonymized_telemetry=False,
             is_persistent=True
         ))
-        
-        # Initialize embedding function
-        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
-        
-        # Create or get the collection
-        self.collection = self.client.get_or_create_collection(
+        collection = client.get_or_create_collection(
             name="documents",
             metadata={"hnsw:space": "cosine"},
-            embedding_function=self.embedding_function
+            embedding_function=self.base_embedding_function
         )
+        return client, client._system, collection
         
-        logger.info(f"Initialized ChromaStore with persistence at {persist_directory}")
+    @contextmanager
+    def _reading(self) -> Iterator[None]:
+        """Keep the current Chroma system running while a query uses it."""
+        with self._readers_lock:
+            system = self._system
+            self._readers[id(system)] = self._readers.get(id(system), 0) + 1
+        try:
+            yield
+        finally:
+            with self._readers_lock:
+                self._readers[id(system)] -= 1
+                idle = not self._readers[id(system)]
+                if idle:
+                    del self._readers[id(system)]
+                # The last query on a system that refresh() has replaced stops it
+                retired = idle and system is not self._system
+            if retired:
+                system.stop()
+        
+    def _bump_version(self) -> None:
+        """Mark the collection as changed, invalidating this process's cached query results."""
+        self.version += 1
+        self.query_cache.clear()
+            
+    def _read_generation(self) -> str:
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return ""
+            
+    def _publish_generation(self) -> None:
+        """Atomically write a new generation so other processes see the change."""
+        generation = uuid.uuid4().hex
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.generation_path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(generation)
+            os.replace(tmp_path, self.generation_path)
+            self.generation = generation
+        except OSError as e:
+            logger.error(f"Error writing store generation {self.generation_path}: {str(e)}")
+            
+    def refresh(self) -> bool:
+        """
+        Pick up changes another process has made to the store.
+        
+        Chroma keeps its vector index in memory, so a client never sees vectors
+        written by another process. When the on-disk generation has moved, a new
+        client and collection are opened and a fresh BM25 index is loaded and
+        reconciled with them, then all three are swapped in together and cached
+        query results are dropped. Queries already running finish on the old
+        client, whose Chroma system is stopped once the last of them is done.
+        
+        Returns:
+            True if the store was reloaded
+        """
+        generation = self._read_generation()
+        if generation == self.generation:
+            return False
+        with self._write_lock:
+            if generation == self.generation:
+                return False
+            logger.info("Store changed on disk, reloading")
+            # Chroma shares one system per directory within a process; it has to be
+            # dropped from the cache for a new client to read the index from disk.
+            # The old system keeps serving the handles opened on it until stopped.
+            self.client.clear_system_cache()
+            client, system, collection = self._connect()
+            lexical_index = None
+            if self.lexical_index is not None:
+                lexical_index = BM25Index(self.lexical_index.index_path)
+                self._ensure_lexical_index(lexical_index, collection)
+            
+            with self._readers_lock:
+                old_system = self._system
+                self.client, self._system, self.collection = client, system, collection
+                self.lexical_index = lexical_index
+                idle = id(old_system) not in self._readers
+            if idle:
+                old_system.stop()
+            self.generation = generation
+            self._bump_version()
+        return True
+        
+    def _ensure_lexical_index(self, lexical_index: BM25Index, collection) -> None:
+        """Rebuild a lexical index from the collection if it is out of step, e.g. on first use."""
+        try:
+            count = collection.count()
+            if len(lexical_index) == count:
+                return
+            logger.info(f"Rebuilding BM25 index from {count} documents")
+            lexical_index.clear()
+            for offset in range(0, count, LEXICAL_REBUILD_PAGE_SIZE):
+                page = collection.get(include=["documents"], limit=LEXICAL_REBUILD_PAGE_SIZE, offset=offset)
+                lexical_index.add(page["ids"], page["documents"])
+            lexical_index.save()
+        except Exception as e:
+            logger.error(f"Error rebuilding BM25 index: {str(e)}")
+            
+    def save(self) -> None:
+        """
+        Persist the BM25 index and publish a new generation, so other processes reload once.
         
-    def add_documents(self, documents: List[Document]) -> None:
+        Every write calls this when it finishes, after its last batch; call it
+        directly after deleting documents with save=False.
+        """
+        if self.lexical_index is not None:
+            try:
+                self.lexical_index.save()
+            except Exception as e:
+                logger.error(f"Error saving BM25 index: {str(e)}")
+        # Published after the save, so readers that reload load the saved index
+        self._publish_generation()
+        
+    def _prepare_documents(self, documents: List[Document]) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
+        """Convert Langchain documents into Chroma texts, sanitized metadatas and deterministic IDs."""
+        documents_data = []
+        metadatas = []
+        ids = []
+        
+        for doc in documents:
+            # Extract text content
+            documents_data.append(doc.page_content)
+            
+            # Extract and sanitize metadata
+            metadata = doc.metadata.copy() if hasattr(doc, 'metadata') else {}
+            # Ensure all metadata values are valid types
+            sanitized_metadata = {}
+            for key, value in metadata.items():
+                if value is None:
+                    continue
+                if isinstance(value, (str, int, float, bool)):
+                    sanitized_metadata[key] = value
+                else:
+                    sanitized_metadata[key] = str(value)
+                    
+            # Stable ID so re-ingesting the same chunk overwrites instead of duplicating
+            chunk_id = make_chunk_id(doc)
+            sanitized_metadata['doc_id'] = chunk_id
+            metadatas.append(sanitized_metadata)
+            ids.append(chunk_id)
+            
+        return documents_data, metadatas, ids
+        
+    def _write_batch(self, documents: List[Document], embeddings: Optional[List[Any]] = None, upsert: bool = True) -> List[str]:
+        """Write one batch of documents, optionally with precomputed embeddings."""
+        documents_data, metadatas, ids = self._prepare_documents(documents)
+        if embeddings is None:
+            embeddings = self.embedding_function(documents_data)
+        
+        with self._write_lock:
+            self._write_prepared(documents_data, metadatas, ids, embeddings, upsert)
+        return ids
+        
+    def _write_prepared(self, documents_data: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                        embeddings: List[Any], upsert: bool) -> None:
+        """Write prepared documents to the collection and lexical index; callers hold the write lock."""
+        # Chroma rejects duplicate IDs within one call, so keep the last occurrence
+        unique = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        if len(unique) != len(ids):
+            keep = sorted(unique.values())
+            documents_data = [documents_data[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            batch_ids = [ids[i] for i in keep]
+            embeddings = [embeddings[i] for i in keep]
+        else:
+            batch_ids = ids
+        
+        write = self.collection.upsert if upsert else self.collection.add
+        try:
+            write(documents=documents_data, metadatas=metadatas, embeddings=embeddings, ids=batch_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.add(batch_ids, documents_data)
+        finally:
+            self._bump_version()
+        
+    def add_documents(self, documents: List[Document]) -> List[str]:
         """
         Add documents to the Chroma database.
         
+        Documents whose IDs already exist in the collection are left untouched;
+        use upsert_documents to overwrite them.
+        
         Args:
             documents: List of Langchain Document objects to add
+            
+        Returns:
+            List of IDs assigned to the documents, in the same order
         """
         try:
             if not documents:
                 logger.warning("No documents provided to add to Chroma")
-                return
+                return []
                 
-            # Prepare documents for Chroma
-            documents_data = []
-            metadatas = []
-            ids = []
-            
-            for i, doc in enumerate(documents):
-                # Extract text content
-                documents_data.append(doc.page_content)
-                
-                # Extract and sanitize metadata
-                metadata = doc.metadata.copy() if hasattr(doc, 'metadata') else {}
-                # Ensure all metadata values are valid types
-                sanitized_metadata = {}
-                for key, value in metadata.items():
-                    if value is None:
-                        continue
-                    if isinstance(value, (str, int, float, bool)):
-                        sanitized_metadata[key] = value
-                    else:
-                        sanitized_metadata[key] = str(value)
-                sanitized_metadata['doc_id'] = str(i)
-                metadatas.append(sanitized_metadata)
-                
-                # Generate unique ID using timestamp and index
-                ids.append(f"doc_{int(time.time())}_{i}")
-            
-            # Add documents to collection
-            self.collection.add(
-                documents=documents_data,
-                metadatas=metadatas,
-                ids=ids
-            )
+            ids = self._write_batch(documents, upsert=False)
+            self.save()
             
             logger.info(f"Successfully added {len(documents)} documents to Chroma")
+            return ids
             
         except Exception as e:
             logger.error(f"Error adding documents to Chroma: {str(e)}")
             raise
             
+    def upsert_documents(self, documents: List[Document]) -> List[str]:
+        """
+        Insert or update documents in the Chroma database.
+        
+        Because IDs are derived from the chunk itself, re-ingesting the same
+        content is idempotent.
+        
+        Args:
+            documents: List of Langchain Document objects to upsert
+            
+        Returns:
+            List of IDs assigned to the documents, in the same order
+        """
+        try:
+            if not documents:
+                logger.warning("No documents provided to upsert to Chroma")
+                return []
+                
+            ids = self._write_batch(documents, upsert=True)
+            self.save()
+            
+            logger.info(f"Successfully upserted {len(documents)} documents to Chroma")
+            return ids
+            
+        except Exception as e:
+            logger.error(f"Error upserting documents to Chroma: {str(e)}")
+            raise
+            
+    @staticmethod
+    def _iter_batches(documents: Iterable[Document], batch_size: int) -> Iterator[List[Document]]:
+        """Group an iterable of documents into lists of at most batch_size."""
+        batch = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+            
+    def _embed_batch(self, documents: List[Document]) -> Tuple[List[Any], float]:
+        """Embed a batch of documents and return the embeddings with the time taken."""
+        start = time.perf_counter()
+        embeddings = self.embedding_function([doc.page_content for doc in documents])
+        return embeddings, time.perf_counter() - start
+            
+    def write_documents(
+        self,
+        documents: Iterable[Document],
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        embed_workers: int = 0,
+        upsert: bool = True,
+        on_batch: Optional[Callable[[List[Document], float, float], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream documents into the Chroma database in fixed-size batches.
+        
+        The input can be any iterable, including a generator, so only a bounded
+        number of batches is held in memory at once. With embed_workers > 0,
+        batches are embedded on a thread pool while earlier batches are written,
+        keeping at most embed_workers + 1 batches in flight so every worker stays
+        busy while the oldest batch is written.
+        
+        Args:
+            documents: Iterable of Langchain Document objects to write
+            batch_size: Number of documents embedded and written per batch
+            embed_workers: Number of embedding threads (0 embeds inline)
+            upsert: Overwrite existing IDs instead of skipping them
+            on_batch: Optional callback receiving each written batch with its
+                embed and write seconds
+            
+        Returns:
+            Dictionary with chunk and batch counts, timings and throughput
+        """
+        stats = {"chunks": 0, "batches": 0, "embed_seconds": 0.0, "write_seconds": 0.0}
+        start = time.perf_counter()
+        
+        def write(batch, embeddings, embed_seconds):
+            write_start = time.perf_counter()
+            self._write_batch(batch, embeddings=embeddings, upsert=upsert)
+            write_seconds = time.perf_counter() - write_start
+            
+            stats["chunks"] += len(batch)
+            stats["batches"] += 1
+            stats["embed_seconds"] += embed_seconds
+            stats["write_seconds"] += write_seconds
+            batch_seconds = embed_seconds + write_seconds
+            rate = len(batch) / batch_seconds if batch_seconds > 0 else 0.0
+            logger.info(
+                f"Batch {stats['batches']}: {len(batch)} chunks, embed {embed_seconds:.2f}s, "
+                f"write {write_seconds:.2f}s ({rate:.1f} chunks/s)"
+            )
+            if on_batch:
+                on_batch(batch, embed_seconds, write_seconds)
+        
+        try:
+            if embed_workers > 0:
+                with ThreadPoolExecutor(max_workers=embed_workers) as executor:
+                    pending = deque()
+                    for batch in self._iter_batches(documents, batch_size):
+                        pending.append((batch, executor.submit(self._embed_batch, batch)))
+                        # Bound memory: wait for the oldest batch before reading further
+                        if len(pending) > embed_workers:
+                            done_batch, future = pending.popleft()
+                            write(done_batch, *future.result())
+                    while pending:
+                        done_batch, future = pending.popleft()
+                        write(done_batch, *future.result())
+            else:
+                for batch in self._iter_batches(documents, batch_size):
+                    write(batch, *self._embed_batch(batch))
+        except Exception as e:
+            logger.error(f"Error writing documents to Chroma: {str(e)}")
+            raise
+        finally:
+            self.save()
+            
+        stats["total_seconds"] = time.perf_counter() - start
+        stats["chunks_per_second"] = stats["chunks"] / stats["total_seconds"] if stats["total_seconds"] > 0 else 0.0
+        logger.info(
+            f"Wrote {stats['chunks']} chunks in {stats['batches']} batches "
+            f"({stats['chunks_per_second']:.1f} chunks/s)"
+        )
+        return stats
+            
+    def delete_documents(self, ids: List[str], save: bool = True) -> None:
+        """
+        Delete documents from the Chroma database by ID.
+        
+        Args:
+            ids: List of document IDs to delete
+            save: Persist the BM25 index and publish the change afterwards; batch
+                callers such as ingestion pass False and save once when they are done
+        """
+        try:
+            if not ids:
+                return
+            with self._write_lock:
+                try:
+                    self.collection.delete(ids=list(ids))
+                    if self.lexical_index is not None:
+                        self.lexical_index.remove(ids)
+                    if save:
+                        self.save()
+                finally:
+                    self._bump_version()
+            logger.info(f"Deleted {len(ids)} documents from Chroma")
+        except Exception as e:
+            logger.error(f"Error deleting documents from Chroma: {str(e)}")
+            raise
+            
+    def reset_collection(self, name: str = "documents") -> None:
+        """Drop and recreate the document collection."""
+        try:
+            with self._write_lock:
+                try:
+                    self.client.delete_collection(name=name)
+                except Exception:
+                    pass  # Collection might not exist yet
+                self.collection = self.client.create_collection(
+                    name=name,
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=self.base_embedding_function
+                )
+                if self.lexical_index is not None:
+                    self.lexical_index.clear()
+                self.save()
+                self._bump_version()
+            logger.info(f"Reset collection: {name}")
+        except Exception as e:
+            logger.error(f"Error resetting collection: {str(e)}")
+            raise
+            
+    def _gather_candidates(self, query_text: str, query_embeddings: List[Any], fetch_k: int,
+                           query_include: List[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Collect query candidates from the vector index and, in hybrid mode, the BM25 index.
+        
+        Lexical hits the vector search did not return are fetched by ID without their
+        embeddings and given a NaN distance, so the reranker places them by their
+        lexical rank alone. Only when the caller asked for embeddings, which then
+        have to be fetched anyway, is their cosine distance computed from them.
+        
+        Returns:
+            Tuple of (candidates, exhausted) where exhausted is True when no more
+            candidates would be found by fetching more
+        """
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=fetch_k,
+            include=query_include
+        )
+        ids = list(results['ids'][0]) if results and results.get('ids') else []
+        distances = list(results['distances'][0]) if results.get('distances') else []
+        documents = list(results['documents'][0]) if results.get('documents') else [""] * len(ids)
+        metadatas = list(results['metadatas'][0]) if results.get('metadatas') else None
+        embeddings = None
+        if results.get('embeddings') is not None and len(results['embeddings']) > 0:
+            embeddings = np.asarray(results['embeddings'][0], dtype=np.float32)
+        exhausted = len(ids) < fetch_k
+        
+        lexical_ranks = None
+        if self.lexical_index is not None and len(self.lexical_index):
+            lexical_hits = self.lexical_index.search(query_text, fetch_k)
+            rank_by_id = {doc_id: rank for rank, (doc_id, _) in enumerate(lexical_hits)}
+            exhausted = exhausted and len(lexical_hits) < fetch_k
+            
+            seen = set(ids)
+            missing = [doc_id for doc_id, _ in lexical_hits if doc_id not in seen]
+            if missing:
+                get_include = ["documents"] + [field for field in ("metadatas", "embeddings") if field in query_include]
+                extra = self.collection.get(ids=missing, include=get_include)
+                if len(extra['ids']):
+                    if "embeddings" in query_include:
+                        extra_embeddings = np.asarray(extra['embeddings'], dtype=np.float32)
+                        # Cosine distance, matching the collection's hnsw:space
+                        query_vector = np.asarray(query_embeddings[0], dtype=np.float32)
+                        norms = np.linalg.norm(extra_embeddings, axis=1) * np.linalg.norm(query_vector)
+                        similarity = extra_embeddings @ query_vector / np.where(norms == 0, 1, norms)
+                        distances.extend((1.0 - similarity).tolist())
+                        embeddings = extra_embeddings if embeddings is None else np.vstack([embeddings, extra_embeddings])
+                    else:
+                        distances.extend([float("nan")] * len(extra['ids']))
+                    ids.extend(extra['ids'])
+                    documents.extend(extra['documents'])
+                    if metadatas is not None:
+                        metadatas.extend(extra['metadatas'])
+            lexical_ranks = [rank_by_id.get(doc_id) for doc_id in ids]
+        
+        candidates = {
+            "ids": ids,
+            "distances": distances,
+            "documents": documents,
+            "metadatas": metadatas,
+            "embeddings": embeddings,
+            "lexical_ranks": lexical_ranks
+        }
+        return candidates, exhausted
+            
     def query_documents(self, query_text: str, n_results: int = 3, include_fields: List[str] = None) -> List[Dict[str, Any]]:
         """
         Query the Chroma database for similar documents.
@@ -101,84 +670,74 @@ class ChromaStore:
             include_fields: List of fields to include in results ('documents', 'metadatas', 'embeddings')
             
         Returns:
-            List of dictionaries containing matched documents and their metadata
+            List of dictionaries containing matched documents and their metadata.
+            Embeddings, when requested, are float32 NumPy rows of a single matrix.
+            In hybrid mode, keyword-only matches have no similarity unless
+            embeddings were requested.
         """
         try:
             # Prepare query parameters
             include = include_fields if include_fields else ["documents", "metadatas"]
             
-            # Query with more results initially to allow for filtering
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results * 3,  # Get more results to filter
-                include=include + ["embeddings", "distances"]
-            )
+            # Repeated queries against an unchanged collection are served from cache
+            self.refresh()
+            cache_key = QueryCache.make_key(self.generation, self.version, query_text, n_results, include)
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Query cache hit ({len(cached)} documents)")
+                return cached
+            
+            # Documents and distances are always needed for filtering and scoring;
+            # metadatas and embeddings are only fetched when the caller asks for them
+            query_include = ["documents", "distances"]
+            query_include += [field for field in ("metadatas", "embeddings") if field in include]
+            query_embeddings = self.embedding_function([query_text])
+            
+            # IDs are unique per chunk, so only a small headroom is needed for filtering.
+            # If filtering still leaves fewer than n_results, widen the pool and re-rank.
+            fetch_k = n_results + QUERY_FILTER_HEADROOM
+            with self._reading():
+                for _ in range(QUERY_MAX_FETCH_ROUNDS):
+                    candidates, exhausted = self._gather_candidates(query_text, query_embeddings, fetch_k, query_include)
+                    ranked = self.reranker.rerank(
+                        query_text,
+                        candidates["documents"],
+                        candidates["distances"],
+                        n_results,
+                        lexical_ranks=candidates["lexical_ranks"]
+                    )
+                    if len(ranked) >= n_results or exhausted:
+                        break
+                    fetch_k *= 2
             
-            # Format and filter results
+            # Format results in re-ranked order
             formatted_results = []
-            seen_content = set()  # Track unique content
+            metadatas = candidates["metadatas"]
+            embeddings = candidates["embeddings"]
             
-            if results:
-                n = len(results.get('distances', [[]])[0]) if results.get('distances') else 0
-                for i in range(n):
-                    content = results['documents'][0][i] if results.get('documents') else ""
-                    
-                    # Skip if we've seen this content before
-                    content_hash = hash(content)
-                    if content_hash in seen_content:
-                        continue
-                    seen_content.add(content_hash)
-                    
-                    # Skip unwanted content
-                    content = content.strip()
-                    
-                    # Skip if content is too short or contains unwanted elements
-                    if len(content) < 50 or any([
-                        content.startswith('http'),
-                        content.startswith('Retrieved from'),
-                        'References' in content[:20],
-                        'External links' in content[:20]
-                    ]):
-                        continue
-                        
-                    # Boost relevance for content containing key information
-                    relevance_boost = 0.0
-                    if query_text.lower() in content.lower():
-                        relevance_boost += 0.1
-                    if any(term in content.lower() for term in ['lake', 'tippecanoe', 'location', 'description']):
-                        relevance_boost += 0.05
-                        
-                    # Clean up content that starts with a period
-                    if content.startswith('.'):
-                        content = content[1:].strip()
-                        if len(content) < 30:  # Skip if too short after cleanup
-                            continue
-                    
-                    result = {}
-                    
-                    # Add cleaned content if included
-                    if 'documents' in include:
-                        result['content'] = content
-                        
-                    # Skip if content is empty after cleaning
-                    if not result.get('content', '').strip():
-                        continue
-                    
-                    # Add metadata if included
-                    if 'metadatas' in include and results.get('metadatas'):
-                        result['metadata'] = results['metadatas'][0][i]
-                    
-                    # Add embeddings if included
-                    if 'embeddings' in include and results.get('embeddings'):
-                        result['embedding'] = results['embeddings'][0][i]
-                    
-                    # Adjust similarity score with boost
-                    if results.get('distances'):
-                        result['similarity'] = 1 - results['distances'][0][i] + relevance_boost
-                    
-                    formatted_results.append(result)
+            for i, content, score in ranked:
+                result = {}
+                
+                # Add cleaned content if included
+                if 'documents' in include:
+                    result['content'] = content
+                
+                # Add metadata if included
+                if metadatas is not None:
+                    result['metadata'] = metadatas[i]
+                
+                # Add embedding as a row of the shared matrix if included
+                if embeddings is not None:
+                    result['embedding'] = embeddings[i]
+                
+                # Similarity including relevance boosts; unknown for keyword-only matches
+                if score is not None:
+                    result['similarity'] = score
+                
+                formatted_results.append(result)
                     
             logger.info(f"Found {len(formatted_results)} matching documents")
+            self.query_cache.put(cache_key, formatted_results)
             return formatted_results
             
         except Exception as e:
@@ -188,7 +747,8 @@ class ChromaStore:
     def get_collection_stats(self) -> Dict[str, int]:
         """Get statistics about the document collection."""
         try:
-            count = self.collection.count()
+            with self._reading():
+                count = self.collection.count()
             return {
                 "total_documents": count
             }
@@ -196,18 +756,47 @@ class ChromaStore:
             logger.error(f"Error getting collection stats: {str(e)}")
             raise
             
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get query cache hit-rate statistics along with the current collection version."""
+        stats = {**self.query_cache.stats(), "version": self.version, "generation": self.generation}
+        if isinstance(self.embedding_function, CachedEmbeddingFunction):
+            stats["embedding_cache"] = self.embedding_function.stats()
+        return stats
+            
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection by name, invalidating cached query results."""
+        with self._write_lock:
+            try:
+                self.client.delete_collection(name=name)
+                if self.lexical_index is not None and name == self.collection.name:
+                    self.lexical_index.clear()
+                self.save()
+            finally:
+                self._bump_version()
+            
+    def heartbeat(self) -> bool:
+        """Check that the Chroma client and the document collection are usable."""
+        try:
+            with self._reading():
+                self.client.heartbeat()
+                self.collection.count()
+            return True
+        except Exception as e:
+            logger.error(f"Chroma health check failed: {str(e)}")
+            return False
+            
     def get_collections(self) -> Dict[str, Any]:
         """Get all collections and their details from ChromaDB."""
         try:
-            collection_names = self.client.list_collections()
             collections_dict = {}
-            for name in collection_names:
-                collection = self.client.get_collection(name=name)
-                collections_dict[name] = {
-                    "name": name,
-                    "metadata": collection.metadata,
-                    "count": collection.count()
-                }
+            with self._reading():
+                for name in self.client.list_collections():
+                    collection = self.client.get_collection(name=name)
+                    collections_dict[name] = {
+                        "name": name,
+                        "metadata": collection.metadata,
+                        "count": collection.count()
+                    }
             return collections_dict
         except Exception as e:
             logger.error(f"Error getting collections: {str(e)}")
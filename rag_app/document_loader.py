@@ -1,14 +1,16 @@
 import os
 import shutil
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from langchain_community.document_loaders import TextLoader, Docx2txtLoader, PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langsmith import Client
 import logging
 import glob
-from chroma_store import ChromaStore
+from chroma_store import ChromaStore, make_chunk_id, DEFAULT_WRITE_BATCH_SIZE
+from document_parser import DocumentParser, ParseWorkUnit, parse_file, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+from ingest_manifest import IngestManifest, hash_file
+from ingest_metrics import IngestMetrics
+from telemetry import get_telemetry_queue
 
 # Load environment variables
 load_dotenv()
@@ -17,44 +19,70 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = ('.txt', '.doc', '.docx', '.pdf')
+
+# File types whose extraction is CPU-bound enough to benefit from worker processes
+CPU_BOUND_EXTENSIONS = ('.doc', '.docx', '.pdf')
+
+EXECUTOR_BACKENDS = ('auto', 'thread', 'process')
+
 class DocumentLoader:
-    def __init__(self, data_dir="data"):
-        """Initialize the document loader with the data directory path."""
+    def __init__(self, data_dir="data", write_batch_size=DEFAULT_WRITE_BATCH_SIZE, embed_workers=0,
+                 executor="auto", max_workers=None, verbose=False, metrics_log=None):
+        """
+        Initialize the document loader with the data directory path.
+        
+        Args:
+            data_dir: Directory containing documents to ingest
+            write_batch_size: Number of chunks embedded and written per Chroma batch
+            embed_workers: Number of embedding threads used during ingestion (0 embeds inline)
+            executor: Parsing backend - 'thread', 'process', or 'auto' to use processes
+                when several PDF/DOCX files need parsing
+            max_workers: Number of parsing workers (defaults to the CPU count)
+            verbose: Log full document content and every chunk while parsing
+            metrics_log: Optional JSON-lines file that each run's ingestion metrics are appended to
+        """
+        if executor not in EXECUTOR_BACKENDS:
+            raise ValueError(f"Unsupported executor backend: {executor}")
+            
         # Ensure we use the correct path relative to the rag_app directory
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.data_dir = os.path.join(base_dir, data_dir)
         self.completed_dir = os.path.join(self.data_dir, "completed")
-        self.langsmith_client = Client()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=50,
-            length_function=len,
-            separators=[
-                "\n## ",     # Section headers
-                "\n### ",    # Subsection headers
-                "\n\n",      # Paragraphs
-                ". ",        # Sentences
-                "? ",        # Questions
-                "! ",        # Exclamations
-                "\n",        # Lines
-                " ",         # Words
-                ""          # Characters
-            ]
-        )
+        self.write_batch_size = write_batch_size
+        self.embed_workers = embed_workers
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.verbose = verbose
+        self.metrics_log = metrics_log
+        self.last_metrics = None
+        # LangSmith runs are sent from a background queue, falling back to a local file
+        self.telemetry = get_telemetry_queue(os.path.join(self.data_dir, "telemetry.jsonl"))
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.chunk_overlap = DEFAULT_CHUNK_OVERLAP
+        self.parser = DocumentParser(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, verbose=verbose)
+        self.text_splitter = self.parser.text_splitter
         
         # Initialize Chroma store with absolute path
         chroma_db_path = os.path.join(self.data_dir, "chroma_db")
         self.chroma_store = ChromaStore(persist_directory=chroma_db_path)
         
+        # Track ingested files so only new or changed files are re-embedded
+        self.manifest = IngestManifest(
+            os.path.join(self.data_dir, "ingest_manifest.json"),
+            roots=[self.data_dir, self.completed_dir]
+        )
+        
         # Ensure completed directory exists
         if not os.path.exists(self.completed_dir):
             os.makedirs(self.completed_dir)
         
     def move_to_completed(self, file_path):
-        """Move a processed file to the completed directory."""
+        """Move a processed file to the completed directory, keeping its path relative to the data directory."""
         try:
             filename = os.path.basename(file_path)
-            destination = os.path.join(self.completed_dir, filename)
+            destination = self._completed_path(file_path)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
             shutil.move(file_path, destination)
             logger.info(f"Moved {filename} to completed folder")
         except Exception as e:
@@ -62,207 +90,205 @@ class DocumentLoader:
             
     def get_appropriate_loader(self, file_path):
         """Get the appropriate loader based on file extension."""
-        _, ext = os.path.splitext(file_path)
-        if ext.lower() == '.txt':
-            return TextLoader(file_path)
-        elif ext.lower() in ['.doc', '.docx']:
-            return Docx2txtLoader(file_path)
-        elif ext.lower() == '.pdf':
-            return PyPDFLoader(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
+        return self.parser.get_appropriate_loader(file_path)
         
     def _detect_section(self, content):
         """Detect section from content based on headers."""
-        lines = content.split('\n')
-        for line in lines:
-            if line.startswith('##'):
-                return line.strip('# ').strip()
-        return None
+        return self.parser.detect_section(content)
 
     def _validate_chunk(self, chunk):
         """Validate chunk quality."""
-        min_chunk_size = 30  # Minimum characters
-        content = chunk.page_content.strip()
-        
-        # Immediately reject unwanted content
-        if any([
-            content.startswith('http'),  # URLs
-            content.startswith('Retrieved from'),  # Wikipedia footer
-            'References' in content and len(content) < 100,  # Short reference sections
-            'External links' in content and len(content) < 100  # Short external links sections
-        ]):
-            return False
-            
-        # Check size
-        if len(content) < min_chunk_size:
-            return False
-            
-        # Split into lines and words
-        lines = content.split('\n')
-        words = content.split()
-        
-        # Reject if too few words
-        if len(words) < 5:
-            return False
-            
-        # Accept if it's a complete paragraph
-        if len(words) > 20 and content[-1] in '.!?':
-            return True
-            
-        # Accept if it contains meaningful location or feature descriptions
-        location_indicators = ['shore', 'lake', 'bay', 'park', 'marina', 'resort']
-        if any(indicator in content.lower() for indicator in location_indicators):
-            return True
-            
-        # Accept if it's a multi-line description without too many special characters
-        if len(lines) > 1 and len(words) > 10:
-            special_chars = sum(1 for c in content if c in '[](){}:/')
-            if special_chars <= 3:  # Allow some formatting but not too much
-                return True
-                
-        return False
+        return self.parser.validate_chunk(chunk)
 
     def split_text(self, document):
         """Split document into chunks with enhanced metadata."""
-        if not document.page_content or len(document.page_content.strip()) == 0:
-            logger.warning("Empty document content, skipping text splitting")
-            return []
-            
-        chunks = self.text_splitter.split_documents([document])
-        valid_chunks = []
+        return self.parser.split_text(document)
         
-        # Enhance chunks with metadata
-        for i, chunk in enumerate(chunks):
-            if self._validate_chunk(chunk):
-                # Ensure all metadata values are valid types (str, int, float, bool)
-                chunk.metadata.update({
-                    'chunk_index': i,
-                    'total_chunks': len(chunks),
-                    'chunk_size': len(chunk.page_content),
-                    'source_document': document.metadata.get('source', ''),
-                    'section': self._detect_section(chunk.page_content) or 'unknown',  # Default if None
-                    'created_at': datetime.now().isoformat(),
-                    'content_type': 'text'  # Default content type
-                })
-                valid_chunks.append(chunk)
-            else:
-                logger.warning(f"Chunk {i} failed validation, skipping")
-                
-        return valid_chunks
+    def _log_document_run(self, file_path, stats):
+        """Queue a processed document for LangSmith logging without blocking ingestion."""
+        self.telemetry.record(
+            name="document_loading",
+            run_type="chain",
+            inputs={"file_path": file_path},
+            outputs=stats
+        )
         
     def process_document(self, doc, file_path):
         """Process a single document with enhanced metadata."""
         try:
-            char_count = len(doc.page_content)
-            if char_count == 0:
-                logger.warning(f"Empty document content in {file_path}")
-                return []
-                
-            # Add document metadata
-            doc_metadata = {
-                'source': file_path,
-                'doc_type': os.path.splitext(file_path)[1].lstrip('.') or 'unknown',
-                'created_at': datetime.now().isoformat(),
-                'total_chars': char_count,
-                'language': 'en'  # Default language
-            }
-            doc.metadata.update(doc_metadata)
-            
-            logger.info(f"Processing document: {file_path}")
-            logger.info(f"Document characters: {char_count}")
-            print(f"\nOriginal Document Content:\n{'-' * 80}\n{doc.page_content}\n{'-' * 80}")
-            
-            # Split the document into chunks
-            doc_chunks = self.split_text(doc)
-            
+            doc_chunks, stats = self.parser.process_document(doc, file_path)
             if doc_chunks:
-                # Print chunks with character counts
-                print(f"\nDocument Chunks ({len(doc_chunks)}):")
-                for i, chunk in enumerate(doc_chunks, 1):
-                    chunk_chars = len(chunk.page_content)
-                    print(f"\nChunk {i} ({chunk_chars} characters):")
-                    print("-" * 40)
-                    print(chunk.page_content.strip())
-                    print("-" * 40)
-                
-                # Log to LangSmith
-                try:
-                    avg_chunk_size = sum(len(c.page_content) for c in doc_chunks) / len(doc_chunks)
-                    self.langsmith_client.create_run(
-                        name="document_loading",
-                        run_type="chain",
-                        inputs={"file_path": file_path},
-                        outputs={
-                            "char_count": char_count,
-                            "content_preview": doc.page_content[:100] + "...",
-                            "num_chunks": len(doc_chunks),
-                            "avg_chunk_size": avg_chunk_size
-                        }
-                    )
-                except Exception as e:
-                    logger.error(f"Error logging to LangSmith: {str(e)}")
-            
+                self._log_document_run(file_path, stats)
             return doc_chunks
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {str(e)}")
             return []
         
+    def _completed_path(self, file_path):
+        """Get where a file in the data directory lives once it is moved to the completed directory."""
+        return os.path.join(self.completed_dir, *self.manifest.key_for(file_path).split("/"))
+
+    def _in_completed(self, file_path):
+        return os.path.abspath(file_path).startswith(os.path.abspath(self.completed_dir) + os.sep)
+
+    def _list_supported_files(self, directory):
+        """List supported files in a directory and its subfolders, leaving out the completed directory."""
+        files = [f for f in glob.glob(os.path.join(directory, "**", "*.*"), recursive=True)
+                 if f.lower().endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(f)]
+        if os.path.abspath(directory) == os.path.abspath(self.completed_dir):
+            return files
+        return [f for f in files if not self._in_completed(f)]
+
     def _get_files(self):
-        """Get all supported files from the data directory."""
+        """Get supported files that are new or have changed since they were last ingested."""
         files = []
         
-        # Check main data directory
-        main_dir_files = [f for f in glob.glob(os.path.join(self.data_dir, "*.*")) 
-                        if f.lower().endswith(('.txt', '.doc', '.docx', '.pdf')) and 
-                        not os.path.dirname(f).endswith('completed')]
-        files.extend(main_dir_files)
-        
-        # Check completed directory and move files back if needed
-        completed_files = [f for f in glob.glob(os.path.join(self.completed_dir, "*.*"))
-                         if f.lower().endswith(('.txt', '.doc', '.docx', '.pdf'))]
-        
-        # Move completed files back to main directory for reprocessing
-        for completed_file in completed_files:
+        # Files waiting in the data directory and files already moved to completed
+        # are both checked against the manifest, so edits in either place are picked up
+        candidates = self._list_supported_files(self.data_dir) + self._list_supported_files(self.completed_dir)
+        for file_path in candidates:
             try:
-                filename = os.path.basename(completed_file)
-                destination = os.path.join(self.data_dir, filename)
-                shutil.move(completed_file, destination)
-                files.append(destination)
-                logger.info(f"Moved {filename} back for reprocessing")
-            except Exception as e:
-                logger.error(f"Error moving file back for reprocessing: {str(e)}")
+                if not self.manifest.is_unchanged(file_path):
+                    files.append(file_path)
+            except OSError as e:
+                logger.error(f"Error checking file {file_path}: {str(e)}")
                 
         return files
 
-    def _process_file(self, file_path):
-        """Process a single file."""
-        try:
-            loader = self.get_appropriate_loader(file_path)
-            docs = loader.load()
+    def _get_removed_files(self):
+        """Get manifest keys for files that no longer exist in the data or completed directory."""
+        present = {
+            self.manifest.key_for(f)
+            for f in self._list_supported_files(self.data_dir) + self._list_supported_files(self.completed_dir)
+        }
+        return [key for key in self.manifest.keys() if key not in present]
+
+    def _work_unit(self, file_path, keep_documents=False):
+        """Build the picklable work unit for parsing one file."""
+        return ParseWorkUnit(
+            file_path=file_path,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            keep_documents=keep_documents,
+            verbose=self.verbose
+        )
+
+    def _finish_file(self, result):
+        """
+        Log a parsed file and move it to the completed folder.
+        
+        Runs in the calling process, so worker processes never need the
+        LangSmith client or Chroma store.
+        
+        Returns a (documents, chunks) tuple, or None if no chunks were produced.
+        """
+        for stats in result.doc_stats:
+            self._log_document_run(result.file_path, stats)
+        if self.last_metrics is not None and result.metrics is not None:
+            self.last_metrics.add_file(result.metrics)
             
-            if not docs:
-                logger.warning(f"No content loaded from {file_path}")
-                return None
+        if not result.chunks:
+            return None
             
-            file_chunks = []
-            file_docs = []
-            for doc in docs:
-                doc_chunks = self.process_document(doc, file_path)
-                if doc_chunks:
-                    file_chunks.extend(doc_chunks)
-                    file_docs.append(doc)
+        if not self._in_completed(result.file_path):
+            self.move_to_completed(result.file_path)
+        return (result.documents, result.chunks)
+
+    def _process_file(self, file_path, keep_documents=False):
+        """
+        Process a single file.
+        
+        Returns a (documents, chunks) tuple, or None if no chunks were produced.
+        The loaded documents are only retained when keep_documents is set, so
+        streaming callers hold no more than one file's chunks at a time.
+        """
+        return self._finish_file(self.parser.parse_file(file_path, keep_documents=keep_documents))
+
+    def _select_backend(self, files):
+        """Resolve the executor backend for a set of files."""
+        if self.executor != 'auto':
+            return self.executor
+            
+        # Worker processes cost a spawn and re-import each, so only use them when
+        # there is enough CPU-bound extraction to spread across cores
+        cpu_bound = sum(1 for f in files if f.lower().endswith(CPU_BOUND_EXTENSIONS))
+        if self.max_workers > 1 and cpu_bound > 1:
+            return 'process'
+        return 'thread'
+
+    def _process_files(self, files, keep_documents=False):
+        """
+        Process files in parallel, yielding (file_path, result) pairs as each file completes.
+        
+        Parsing and splitting run on a thread or process pool depending on the
+        configured backend. Submissions are bounded to twice the worker count so
+        finished results never pile up faster than the caller consumes them.
+        """
+        files = list(files)
+        if not files:
+            return
             
-            if file_chunks:
-                self.move_to_completed(file_path)
-                return (file_docs, file_chunks)
+        backend = self._select_backend(files)
+        max_workers = min(self.max_workers, len(files))
+        max_in_flight = max_workers * 2
+        files_iter = iter(files)
+        if backend == 'process':
+            # By now this process runs Chroma, telemetry and embedding threads, and
+            # forking a multithreaded process can deadlock the children
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        logger.info(f"Parsing {len(files)} files with {max_workers} {backend} workers")
+        
+        with executor:
+            pending = {}
             
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {str(e)}")
-        return None
+            def submit_next():
+                for file_path in files_iter:
+                    unit = self._work_unit(file_path, keep_documents)
+                    pending[executor.submit(parse_file, unit)] = file_path
+                    return
+            
+            for _ in range(max_in_flight):
+                submit_next()
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    submit_next()
+                    try:
+                        result = self._finish_file(future.result())
+                    except Exception as e:
+                        logger.error(f"Error processing file {file_path}: {str(e)}")
+                        result = None
+                    yield file_path, result
+
+    def iter_chunks(self, files=None, by_file=False):
+        """
+        Yield chunks from new or changed files as each file finishes processing.
+        
+        Files are yielded in completion order rather than submission order, so the
+        first chunks can be embedded before the last file has been parsed and only
+        a bounded number of files is held in memory.
+        
+        Args:
+            files: Files to process (defaults to new or changed files in the data directory)
+            by_file: Yield (file_path, chunks) per file instead of individual chunks;
+                files that produced no chunks are yielded with an empty list
+        """
+        if files is None:
+            files = self._get_files()
+            
+        for file_path, result in self._process_files(files):
+            file_chunks = result[1] if result else []
+            if by_file:
+                yield file_path, file_chunks
+            else:
+                yield from file_chunks
 
     def load_documents(self):
-        """Load all documents from the data directory with parallel processing."""
+        """Load new or changed documents from the data directory with parallel processing."""
         try:
             files = self._get_files()
             
@@ -273,17 +299,13 @@ class DocumentLoader:
             documents = []
             chunks = []
             
-            # Process files in parallel
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(self._process_file, file_path) 
-                          for file_path in files]
-                
-                for future in futures:
-                    result = future.result()
-                    if result:
-                        docs, doc_chunks = result
-                        documents.extend(docs)
-                        chunks.extend(doc_chunks)
+            self.last_metrics = IngestMetrics()
+            for _, result in self._process_files(files, keep_documents=True):
+                if result:
+                    docs, doc_chunks = result
+                    documents.extend(docs)
+                    chunks.extend(doc_chunks)
+            self._finish_metrics()
             
             logger.info(f"Successfully loaded {len(documents)} documents")
             logger.info(f"Created {len(chunks)} total chunks")
@@ -293,6 +315,130 @@ class DocumentLoader:
         except Exception as e:
             logger.error(f"Error in load_documents: {str(e)}")
             return [], []
+
+    def ingest(self):
+        """
+        Incrementally sync the data directory into the Chroma store.
+        
+        Only new or changed files are loaded, split and embedded. Chunks belonging
+        to changed or removed files are deleted from the store through the chunk
+        IDs recorded in the manifest. A changed file's old chunks are only
+        deleted, and its new chunks recorded, once all of them have been
+        written, so a failed write leaves the previous version searchable.
+        
+        Per-file timings and counts are available afterwards in last_metrics.
+        
+        Returns:
+            Dictionary with counts of processed, removed and failed files, added
+            chunks, write statistics and a metrics summary
+        """
+        summary = {"processed_files": 0, "removed_files": 0, "failed_files": 0, "added_chunks": 0}
+        self.last_metrics = IngestMetrics()
+        
+        # Drop chunks for files that have disappeared
+        for key in self._get_removed_files():
+            self.chroma_store.delete_documents(self.manifest.chunk_ids(key), save=False)
+            self.manifest.remove(key)
+            summary["removed_files"] += 1
+            logger.info(f"Removed chunks for deleted file {key}")
+        
+        files = self._get_files()
+        if not files:
+            logger.info("No new or changed files to ingest")
+            if summary["removed_files"]:
+                self.chroma_store.save()
+            self.manifest.save()
+            summary["metrics"] = self._finish_metrics()
+            return summary
+        
+        # Hash before processing since processed files are moved to the completed folder
+        file_hashes = {}
+        for file_path in files:
+            try:
+                file_hashes[file_path] = hash_file(file_path)
+            except OSError as e:
+                logger.error(f"Error hashing file {file_path}: {str(e)}")
+        
+        # Files whose chunks have been queued but not all written yet, by manifest key
+        pending_files = {}
+        
+        def on_batch(batch, embed_seconds, write_seconds):
+            self.last_metrics.record_batch(batch, embed_seconds, write_seconds)
+            for key, count in Counter(doc.metadata.get('source_key') for doc in batch).items():
+                entry = pending_files.get(key)
+                if entry is None:
+                    continue
+                entry["remaining"] -= count
+                if entry["remaining"] <= 0:
+                    del pending_files[key]
+                    self._commit_file(key, entry, summary)
+        
+        # Chunks are streamed into the store in batches as files finish processing;
+        # files written before a failure are still recorded in the manifest. Deletes
+        # skip saving the BM25 index and publishing the change, which write_documents
+        # does once at the end.
+        try:
+            write_stats = self.chroma_store.write_documents(
+                self._iter_ingest_chunks(file_hashes, pending_files, summary),
+                batch_size=self.write_batch_size,
+                embed_workers=self.embed_workers,
+                on_batch=on_batch
+            )
+        finally:
+            self.manifest.save()
+        summary["write_stats"] = write_stats
+        
+        summary["metrics"] = self._finish_metrics()
+        logger.info(f"Ingestion complete: {summary}")
+        return summary
+
+    def _finish_metrics(self):
+        """Close the current metrics run, append it to the metrics log if configured and return its summary."""
+        self.last_metrics.finish()
+        self.telemetry.flush()
+        if self.metrics_log:
+            self.last_metrics.write_json_lines(self.metrics_log)
+        return self.last_metrics.summary()
+
+    def _iter_ingest_chunks(self, file_hashes, pending_files, summary):
+        """Process changed files and yield their chunks, adding each file to pending_files until it is written."""
+        for file_path, file_chunks in self.iter_chunks(list(file_hashes), by_file=True):
+            if not file_chunks:
+                summary["failed_files"] += 1
+                continue
+            
+            # Chunks are keyed on the file's relative path so same-named files don't collide
+            key = self.manifest.key_for(file_path)
+            for chunk in file_chunks:
+                chunk.metadata['source_key'] = key
+            pending_files[key] = {
+                "file_path": file_path,
+                "chunk_ids": [make_chunk_id(chunk) for chunk in file_chunks],
+                "content_hash": file_hashes[file_path],
+                "remaining": len(file_chunks)
+            }
+            
+            yield from file_chunks
+
+    def _commit_file(self, key, entry, summary):
+        """Drop a file's stale chunks and record it in the manifest once all its new chunks are written."""
+        # IDs are deterministic, so unchanged chunks were overwritten in place and
+        # only chunks that no longer exist in the new version need deleting
+        stale_ids = set(self.manifest.chunk_ids(key)) - set(entry["chunk_ids"])
+        if stale_ids:
+            self.chroma_store.delete_documents(sorted(stale_ids), save=False)
+        
+        completed_path = self._completed_path(entry["file_path"])
+        current_path = completed_path if os.path.exists(completed_path) else entry["file_path"]
+        self.manifest.record(current_path, entry["chunk_ids"], content_hash=entry["content_hash"])
+        summary["processed_files"] += 1
+        summary["added_chunks"] += len(entry["chunk_ids"])
+
+    def reset_index(self):
+        """Drop the Chroma collection and forget all ingested files so the next ingest rebuilds everything."""
+        self.chroma_store.reset_collection()
+        self.manifest.clear()
+        self.manifest.save()
             
     def query_similar_chunks(self, query_text: str, n_results: int = 3):
         """Query Chroma for similar chunks of text."""
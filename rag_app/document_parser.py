@@ -0,0 +1,275 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from langchain_community.document_loaders import TextLoader, Docx2txtLoader, PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from ingest_metrics import FileMetrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 50
+
+
+@dataclass(frozen=True)
+class ParseWorkUnit:
+    """Picklable description of one file to parse, safe to ship to a worker process."""
+    file_path: str
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+    keep_documents: bool = False
+    verbose: bool = False
+
+
+@dataclass
+class ParseResult:
+    """Chunks produced from one file, plus per-document statistics and file metrics."""
+    file_path: str
+    chunks: List[Any] = field(default_factory=list)
+    documents: List[Any] = field(default_factory=list)
+    doc_stats: List[Dict[str, Any]] = field(default_factory=list)
+    metrics: Optional[FileMetrics] = None
+    error: Optional[str] = None
+
+
+class DocumentParser:
+    """
+    Loads, splits and validates documents.
+
+    Holds no clients or connections, so it can be rebuilt inside worker
+    processes from the settings in a ParseWorkUnit.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+                 verbose: bool = False):
+        """
+        Args:
+            chunk_size: Maximum characters per chunk
+            chunk_overlap: Overlap between chunks
+            verbose: Log full document content and every chunk (slow on large files)
+        """
+        self.verbose = verbose
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            separators=[
+                "\n## ",     # Section headers
+                "\n### ",    # Subsection headers
+                "\n\n",      # Paragraphs
+                ". ",        # Sentences
+                "? ",        # Questions
+                "! ",        # Exclamations
+                "\n",        # Lines
+                " ",         # Words
+                ""          # Characters
+            ]
+        )
+
+    def get_appropriate_loader(self, file_path):
+        """Get the appropriate loader based on file extension."""
+        _, ext = os.path.splitext(file_path)
+        if ext.lower() == '.txt':
+            return TextLoader(file_path)
+        elif ext.lower() in ['.doc', '.docx']:
+            return Docx2txtLoader(file_path)
+        elif ext.lower() == '.pdf':
+            return PyPDFLoader(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {ext}")
+
+    def detect_section(self, content):
+        """Detect section from content based on headers."""
+        lines = content.split('\n')
+        for line in lines:
+            if line.startswith('##'):
+                return line.strip('# ').strip()
+        return None
+
+    def validate_chunk(self, chunk):
+        """Validate chunk quality."""
+        min_chunk_size = 30  # Minimum characters
+        content = chunk.page_content.strip()
+
+        # Immediately reject unwanted content
+        if any([
+            content.startswith('http'),  # URLs
+            content.startswith('Retrieved from'),  # Wikipedia footer
+            'References' in content and len(content) < 100,  # Short reference sections
+            'External links' in content and len(content) < 100  # Short external links sections
+        ]):
+            return False
+
+        # Check size
+        if len(content) < min_chunk_size:
+            return False
+
+        # Split into lines and words
+        lines = content.split('\n')
+        words = content.split()
+
+        # Reject if too few words
+        if len(words) < 5:
+            return False
+
+        # Accept if it's a complete paragraph
+        if len(words) > 20 and content[-1] in '.!?':
+            return True
+
+        # Accept if it contains meaningful location or feature descriptions
+        location_indicators = ['shore', 'lake', 'bay', 'park', 'marina', 'resort']
+        if any(indicator in content.lower() for indicator in location_indicators):
+            return True
+
+        # Accept if it's a multi-line description without too many special characters
+        if len(lines) > 1 and len(words) > 10:
+            special_chars = sum(1 for c in content if c in '[](){}:/')
+            if special_chars <= 3:  # Allow some formatting but not too much
+                return True
+
+        return False
+
+    def split_text(self, document, metrics: Optional[FileMetrics] = None):
+        """Split document into chunks with enhanced metadata."""
+        if not document.page_content or len(document.page_content.strip()) == 0:
+            logger.warning("Empty document content, skipping text splitting")
+            return []
+
+        split_start = time.perf_counter()
+        chunks = self.text_splitter.split_documents([document])
+        validate_start = time.perf_counter()
+        valid_chunks = []
+        rejected = 0
+
+        # Enhance chunks with metadata
+        for i, chunk in enumerate(chunks):
+            if self.validate_chunk(chunk):
+                # Ensure all metadata values are valid types (str, int, float, bool)
+                chunk.metadata.update({
+                    'chunk_index': i,
+                    'total_chunks': len(chunks),
+                    'chunk_size': len(chunk.page_content),
+                    'source_document': document.metadata.get('source', ''),
+                    'section': self.detect_section(chunk.page_content) or 'unknown',  # Default if None
+                    'created_at': datetime.now().isoformat(),
+                    'content_type': 'text'  # Default content type
+                })
+                valid_chunks.append(chunk)
+            else:
+                rejected += 1
+                logger.debug(f"Chunk {i} failed validation, skipping")
+
+        if metrics is not None:
+            metrics.split_seconds += validate_start - split_start
+            metrics.validate_seconds += time.perf_counter() - validate_start
+            metrics.chunks += len(valid_chunks)
+            metrics.rejected_chunks += rejected
+        if rejected:
+            logger.info(f"Rejected {rejected} of {len(chunks)} chunks from {document.metadata.get('source', '')}")
+
+        return valid_chunks
+
+    def process_document(self, doc, file_path, metrics: Optional[FileMetrics] = None):
+        """
+        Add document metadata and split a single document into chunks.
+
+        Returns:
+            Tuple of (chunks, stats) where stats summarizes the document for logging
+        """
+        char_count = len(doc.page_content)
+        if metrics is not None:
+            metrics.documents += 1
+            metrics.chars += char_count
+        if char_count == 0:
+            logger.warning(f"Empty document content in {file_path}")
+            return [], None
+
+        # Add document metadata
+        doc_metadata = {
+            'source': file_path,
+            'doc_type': os.path.splitext(file_path)[1].lstrip('.') or 'unknown',
+            'created_at': datetime.now().isoformat(),
+            'total_chars': char_count,
+            'language': 'en'  # Default language
+        }
+        doc.metadata.update(doc_metadata)
+
+        logger.debug(f"Processing document: {file_path} ({char_count} characters)")
+        if self.verbose:
+            logger.info(f"Original Document Content:\n{'-' * 80}\n{doc.page_content}\n{'-' * 80}")
+
+        # Split the document into chunks
+        doc_chunks = self.split_text(doc, metrics=metrics)
+        if not doc_chunks:
+            return [], None
+
+        if self.verbose:
+            logger.info(f"Document Chunks ({len(doc_chunks)}):")
+            for i, chunk in enumerate(doc_chunks, 1):
+                logger.info(f"Chunk {i} ({len(chunk.page_content)} characters):\n{chunk.page_content.strip()}")
+
+        stats = {
+            "char_count": char_count,
+            "content_preview": doc.page_content[:100] + "...",
+            "num_chunks": len(doc_chunks),
+            "avg_chunk_size": sum(len(c.page_content) for c in doc_chunks) / len(doc_chunks)
+        }
+        return doc_chunks, stats
+
+    def parse_file(self, file_path, keep_documents=False) -> ParseResult:
+        """Load a file and split all of its documents into validated chunks."""
+        metrics = FileMetrics(file_path=file_path)
+        result = ParseResult(file_path=file_path, metrics=metrics)
+        try:
+            load_start = time.perf_counter()
+            loader = self.get_appropriate_loader(file_path)
+            docs = loader.load()
+            metrics.load_seconds = time.perf_counter() - load_start
+
+            if not docs:
+                logger.warning(f"No content loaded from {file_path}")
+                return result
+
+            for doc in docs:
+                try:
+                    doc_chunks, stats = self.process_document(doc, file_path, metrics=metrics)
+                except Exception as e:
+                    logger.error(f"Error processing document {file_path}: {str(e)}")
+                    continue
+                if doc_chunks:
+                    result.chunks.extend(doc_chunks)
+                    result.doc_stats.append(stats)
+                    if keep_documents:
+                        result.documents.append(doc)
+
+            logger.info(
+                f"Parsed {file_path}: {metrics.documents} documents, {metrics.chars} characters, "
+                f"{metrics.chunks} chunks ({metrics.rejected_chunks} rejected)"
+            )
+
+        except Exception as e:
+            logger.error(f"Error processing file {file_path}: {str(e)}")
+            result.error = metrics.error = str(e)
+        return result
+
+
+# Parsers are cached per process so worker processes build their splitter once
+_parsers: Dict[tuple, DocumentParser] = {}
+
+
+def parse_file(unit: ParseWorkUnit) -> ParseResult:
+    """Parse one file described by a work unit. Module-level so process pools can pickle it."""
+    key = (unit.chunk_size, unit.chunk_overlap, unit.verbose)
+    parser = _parsers.get(key)
+    if parser is None:
+        parser = _parsers[key] = DocumentParser(
+            chunk_size=unit.chunk_size,
+            chunk_overlap=unit.chunk_overlap,
+            verbose=unit.verbose
+        )
+    return parser.parse_file(unit.file_path, keep_documents=unit.keep_documents)
@@ -0,0 +1,129 @@
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK_SIZE = 500
+
+
+def text_hash(text: str) -> str:
+    """Hash text for use as an embedding cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_model_name(embedding_function: Any) -> str:
+    """Get a stable name identifying the model behind an embedding function."""
+    for attr in ("MODEL_NAME", "model_name", "_model_name"):
+        name = getattr(embedding_function, attr, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embedding_function).__name__
+
+
+class CachedEmbeddingFunction:
+    """
+    Embedding function wrapper backed by an on-disk SQLite cache.
+
+    Vectors are stored as float32 blobs keyed by model name and text hash, so
+    texts that were embedded before - unchanged chunks on re-ingest, or
+    repeated queries - skip model inference entirely. Only cache misses are
+    passed to the wrapped function, in a single call.
+    """
+
+    def __init__(self, embedding_function: Any, cache_path: str, model_name: Optional[str] = None):
+        self.embedding_function = embedding_function
+        self.model_name = model_name or embedding_model_name(embedding_function)
+        self.cache_path = os.path.abspath(cache_path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+
+    def _lookup(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+                chunk = unique[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *chunk]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _store(self, entries: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_name, key, int(vector.shape[0]), vector.tobytes()) for key, vector in entries.items()]
+            )
+            self._conn.commit()
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        texts = list(input)
+        if not texts:
+            return []
+
+        hashes = [text_hash(text) for text in texts]
+        try:
+            cached = self._lookup(hashes)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading embedding cache: {str(e)}")
+            cached = {}
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - sum(1 for key in hashes if key in missing)
+        self.misses += sum(1 for key in hashes if key in missing)
+
+        if missing:
+            vectors = self.embedding_function(list(missing.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            try:
+                self._store(computed)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing embedding cache: {str(e)}")
+            cached.update(computed)
+
+        return [cached[key] for key in hashes]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
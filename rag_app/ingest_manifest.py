@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Dict, List, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """Compute the SHA-256 hash of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Persistent record of which files have been ingested into the vector store.
+
+    Entries are keyed by the file's path relative to whichever root directory
+    holds it, so a file keeps its identity when it is moved between the data
+    directory and the completed directory, and files with the same name in
+    different folders stay distinct. Each entry stores the file's content
+    hash, mtime, size and the IDs of the chunks it produced.
+    """
+
+    def __init__(self, manifest_path: str, roots: Optional[List[str]] = None):
+        self.manifest_path = os.path.abspath(manifest_path)
+        # Most specific root first, since the completed directory lives inside the data directory
+        self.roots = sorted((os.path.abspath(root) for root in roots or []), key=len, reverse=True)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def key_for(self, file_path: str) -> str:
+        """Get the manifest key for a file path: its path relative to its root, with forward slashes."""
+        path = os.path.abspath(file_path)
+        for root in self.roots:
+            if path.startswith(root + os.sep):
+                return os.path.relpath(path, root).replace(os.sep, "/")
+        return os.path.basename(file_path)
+
+    def load(self) -> None:
+        """Load the manifest from disk, starting empty if it is missing or unreadable."""
+        if not os.path.exists(self.manifest_path):
+            self.entries = {}
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("files", {})
+        except Exception as e:
+            logger.error(f"Error reading ingest manifest {self.manifest_path}: {str(e)}")
+            self.entries = {}
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        directory = os.path.dirname(self.manifest_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"files": self.entries}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry for a file, if any."""
+        return self.entries.get(self.key_for(file_path))
+
+    def is_unchanged(self, file_path: str) -> bool:
+        """
+        Check whether a file matches its manifest entry.
+
+        The mtime and size are compared first so unchanged files are not re-hashed.
+        If only the mtime moved (e.g. the file was touched or copied), the content
+        hash decides and the stored stat is refreshed.
+        """
+        entry = self.get(file_path)
+        if not entry:
+            return False
+
+        stat = os.stat(file_path)
+        if entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+            return True
+
+        if entry.get("hash") == hash_file(file_path):
+            entry.update({"mtime": stat.st_mtime, "size": stat.st_size, "path": file_path})
+            return True
+        return False
+
+    def record(self, file_path: str, chunk_ids: List[str], content_hash: Optional[str] = None) -> None:
+        """Record a file as ingested with the IDs of its chunks."""
+        stat = os.stat(file_path)
+        self.entries[self.key_for(file_path)] = {
+            "path": file_path,
+            "hash": content_hash or hash_file(file_path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "chunk_ids": list(chunk_ids),
+        }
+
+    def remove(self, key: str) -> Optional[Dict[str, Any]]:
+        """Remove an entry by key and return it."""
+        return self.entries.pop(key, None)
+
+    def chunk_ids(self, key: str) -> List[str]:
+        """Get the chunk IDs recorded for an entry."""
+        entry = self.entries.get(key)
+        return list(entry.get("chunk_ids", [])) if entry else []
+
+    def keys(self) -> List[str]:
+        """Get all manifest keys."""
+        return list(self.entries.keys())
+
+    def clear(self) -> None:
+        """Forget all ingested files."""
+        self.entries = {}
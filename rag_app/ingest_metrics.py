@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STAGES = ("load", "split", "validate", "embed", "write")
+
+
+@dataclass
+class FileMetrics:
+    """Timings and counts for one ingested file."""
+    file_path: str
+    documents: int = 0
+    chars: int = 0
+    chunks: int = 0
+    rejected_chunks: int = 0
+    load_seconds: float = 0.0
+    split_seconds: float = 0.0
+    validate_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class IngestMetrics:
+    """
+    Metrics for one ingestion run.
+
+    Parsing stages are recorded per file by the parser. Embedding and writing
+    happen in batches that can span files, so batch time is attributed to
+    files in proportion to how many of the batch's chunks they contributed.
+    """
+    files: Dict[str, FileMetrics] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    batches: int = 0
+
+    def add_file(self, metrics: FileMetrics) -> None:
+        """Record the parsing metrics of a file."""
+        self.files[metrics.file_path] = metrics
+
+    def record_batch(self, documents: List[Any], embed_seconds: float, write_seconds: float) -> None:
+        """Attribute the embed and write time of a batch to the files its chunks came from."""
+        self.batches += 1
+        if not documents:
+            return
+        sources = Counter(doc.metadata.get('source_document') or doc.metadata.get('source', '')
+                          for doc in documents)
+        for source, count in sources.items():
+            file_metrics = self.files.get(source)
+            if file_metrics is None:
+                file_metrics = self.files[source] = FileMetrics(file_path=source)
+            share = count / len(documents)
+            file_metrics.embed_seconds += embed_seconds * share
+            file_metrics.write_seconds += write_seconds * share
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """Get totals across all files."""
+        files = list(self.files.values())
+        end = self.finished_at or time.time()
+        summary = {
+            "files": len(files),
+            "failed_files": sum(1 for f in files if f.error),
+            "documents": sum(f.documents for f in files),
+            "chars": sum(f.chars for f in files),
+            "chunks": sum(f.chunks for f in files),
+            "rejected_chunks": sum(f.rejected_chunks for f in files),
+            "batches": self.batches,
+            "elapsed_seconds": end - self.started_at,
+        }
+        for stage in STAGES:
+            summary[f"{stage}_seconds"] = sum(getattr(f, f"{stage}_seconds") for f in files)
+        return summary
+
+    def write_json_lines(self, path: str) -> None:
+        """Append one JSON record per file and a summary record to a JSON-lines log."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        run_at = datetime.fromtimestamp(self.started_at).isoformat()
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                for file_metrics in self.files.values():
+                    f.write(json.dumps({"type": "file", "run_at": run_at, **file_metrics.to_dict()}) + "\n")
+                f.write(json.dumps({"type": "summary", "run_at": run_at, **self.summary()}) + "\n")
+        except Exception as e:
+            logger.error(f"Error writing ingestion metrics to {path}: {str(e)}")
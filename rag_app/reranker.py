@@ -0,0 +1,129 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class BoostRule:
+    """Adds weight to a candidate's score when its content contains any of the terms."""
+    terms: Tuple[str, ...]
+    weight: float
+
+    def pattern(self) -> "re.Pattern":
+        return re.compile("|".join(re.escape(term.lower()) for term in self.terms))
+
+
+# Terms the original corpus was tuned for; pass boost_rules=() to disable
+DEFAULT_BOOST_RULES = (BoostRule(terms=('lake', 'tippecanoe', 'location', 'description'), weight=0.05),)
+DEFAULT_EXACT_MATCH_BOOST = 0.1
+DEFAULT_MIN_CONTENT_LENGTH = 50
+
+# Standard reciprocal rank fusion constant; larger values flatten the rank curve
+RRF_K = 60
+
+
+class Reranker:
+    """
+    Filters, scores and orders query candidates.
+
+    Scores are the cosine similarity plus configured boosts, computed for all
+    candidates at once, followed by a top-k selection over the boosted scores
+    (or their fusion with a lexical ranking) so boosts actually change the
+    order of the results.
+    """
+
+    def __init__(self, boost_rules: Sequence[BoostRule] = DEFAULT_BOOST_RULES,
+                 exact_match_boost: float = DEFAULT_EXACT_MATCH_BOOST,
+                 min_content_length: int = DEFAULT_MIN_CONTENT_LENGTH):
+        self.boost_rules = tuple(boost_rules)
+        self.exact_match_boost = exact_match_boost
+        self.min_content_length = min_content_length
+        self._patterns = [(rule.pattern(), rule.weight) for rule in self.boost_rules if rule.terms]
+
+    def clean(self, content: Optional[str]) -> Optional[str]:
+        """Clean candidate content, or return None if it should be filtered out."""
+        content = (content or "").strip()
+
+        # Skip if content is too short or contains unwanted elements
+        if len(content) < self.min_content_length or any([
+            content.startswith('http'),
+            content.startswith('Retrieved from'),
+            'References' in content[:20],
+            'External links' in content[:20]
+        ]):
+            return None
+
+        # Clean up content that starts with a period
+        if content.startswith('.'):
+            content = content[1:].strip()
+            if len(content) < 30:  # Skip if too short after cleanup
+                return None
+
+        return content or None
+
+    def scores(self, query_text: str, contents: List[Optional[str]], distances: Sequence[float]) -> np.ndarray:
+        """
+        Compute boosted scores for all candidates at once.
+
+        Filtered-out candidates (None content) score -inf, and candidates
+        without a vector distance (NaN) score NaN.
+        """
+        count = len(contents)
+        keep = np.fromiter((c is not None for c in contents), dtype=bool, count=count)
+        scores = 1.0 - np.asarray(distances, dtype=np.float64)
+
+        # Lowercase each candidate once and reuse it for every rule
+        lowered = [c.lower() if c is not None else "" for c in contents]
+        query_lower = query_text.lower().strip()
+        if self.exact_match_boost and query_lower:
+            scores += self.exact_match_boost * np.fromiter(
+                (query_lower in text for text in lowered), dtype=bool, count=count)
+        for pattern, weight in self._patterns:
+            scores += weight * np.fromiter(
+                (pattern.search(text) is not None for text in lowered), dtype=bool, count=count)
+
+        return np.where(keep, scores, -np.inf)
+
+    def rerank(self, query_text: str, contents: Sequence[Optional[str]], distances: Sequence[float],
+               n_results: int, lexical_ranks: Optional[Sequence[Optional[int]]] = None
+               ) -> List[Tuple[int, str, Optional[float]]]:
+        """
+        Filter and re-rank candidates.
+
+        When lexical_ranks is given (each candidate's 0-based rank in a lexical
+        search, or None if it was not matched), the order is the reciprocal rank
+        fusion of the boosted vector ranking and the lexical ranking. Candidates
+        with a NaN distance, i.e. lexical-only matches, are placed by their
+        lexical rank alone; without lexical_ranks they are dropped.
+
+        Returns:
+            Up to n_results (candidate index, cleaned content, score) tuples, best
+            first, where score is the boosted similarity, or None for candidates
+            without a vector distance
+        """
+        cleaned = [self.clean(content) for content in contents]
+        scores = self.scores(query_text, cleaned, distances)
+        scored = np.isfinite(scores)
+        kept = scored if lexical_ranks is None else ~np.isneginf(scores)
+
+        k = min(n_results, int(kept.sum()))
+        if k <= 0:
+            return []
+
+        order_by = np.where(kept, scores, -np.inf)
+        if lexical_ranks is not None:
+            count = len(cleaned)
+            # Rank by boosted score, best first; ties keep the candidate order
+            vector_order = np.lexsort((np.arange(count), -scores))
+            vector_ranks = np.empty(count, dtype=np.float64)
+            vector_ranks[vector_order] = np.arange(count)
+            lexical = np.array([np.inf if rank is None else rank for rank in lexical_ranks], dtype=np.float64)
+            fused = np.where(scored, 1.0 / (RRF_K + vector_ranks + 1), 0.0)
+            fused += np.where(np.isfinite(lexical), 1.0 / (RRF_K + np.minimum(lexical, 1e12) + 1), 0.0)
+            order_by = np.where(kept, fused, -np.inf)
+
+        top = np.argpartition(-order_by, k - 1)[:k]
+        # Best first; ties keep the original candidate order
+        top = top[np.lexsort((top, -order_by[top]))]
+        return [(int(i), cleaned[i], float(scores[i]) if scored[i] else None) for i in top]
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_MAX_QUEUE = 10000
+# How long to send to the file sink after LangSmith fails before trying it again
+ENDPOINT_RETRY_INTERVAL = 60.0
+
+
+def langsmith_configured() -> bool:
+    """Check whether a LangSmith API key is available."""
+    return bool(os.getenv("LANGSMITH_API_KEY") or os.getenv("LANGCHAIN_API_KEY"))
+
+
+class TelemetryQueue:
+    """
+    Background, batched sink for LangSmith run records.
+
+    record() only enqueues, so callers never wait on the network. A daemon
+    thread sends batches when batch_size records are queued or flush_interval
+    has passed, and once more at interpreter shutdown. When no LangSmith key
+    is configured, or the endpoint fails, records go to a local JSON-lines file.
+    """
+
+    def __init__(self, fallback_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.fallback_path = os.path.abspath(fallback_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+        self._endpoint_down_until = 0.0
+        self.stats = {"queued": 0, "sent": 0, "written_to_file": 0, "dropped": 0}
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="langsmith-telemetry", daemon=True)
+                self._thread.start()
+
+    def record(self, name: str, run_type: str, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        """Queue a completed run record without blocking."""
+        now = datetime.now(timezone.utc)
+        run_id = uuid.uuid4()
+        run = {
+            "id": str(run_id),
+            "trace_id": str(run_id),
+            "dotted_order": f"{now.strftime('%Y%m%dT%H%M%S%fZ')}{run_id}",
+            "name": name,
+            "run_type": run_type,
+            "inputs": inputs,
+            "outputs": outputs,
+            "start_time": now.isoformat(),
+            "end_time": now.isoformat(),
+        }
+        try:
+            self._queue.put_nowait(run)
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return
+        self._ensure_started()
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_event.set()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Ask the background thread to send queued records now.
+
+        With a timeout, wait up to that many seconds for the queue to drain.
+        """
+        if self._thread is None:
+            return
+        self._flush_event.set()
+        if timeout:
+            deadline = time.monotonic() + timeout
+            while self._queue.unfinished_tasks and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush remaining records and stop the background thread."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._flush_event.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            self._drain()
+            if self._stop_event.is_set():
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _get_client(self):
+        if self._client is None:
+            from langsmith import Client
+            self._client = Client()
+        return self._client
+
+    def _send(self, batch: List[Dict[str, Any]]) -> None:
+        if not langsmith_configured() or time.monotonic() < self._endpoint_down_until:
+            self._write_fallback(batch)
+            return
+        try:
+            client = self._get_client()
+            if hasattr(client, "batch_ingest_runs"):
+                client.batch_ingest_runs(create=batch)
+            else:
+                for run in batch:
+                    client.create_run(**run)
+            self.stats["sent"] += len(batch)
+        except Exception as e:
+            logger.error(f"Error sending telemetry to LangSmith, using local file sink: {str(e)}")
+            self._endpoint_down_until = time.monotonic() + ENDPOINT_RETRY_INTERVAL
+            self._write_fallback(batch)
+
+    def _write_fallback(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.fallback_path), exist_ok=True)
+            with open(self.fallback_path, "a", encoding="utf-8") as f:
+                for run in batch:
+                    f.write(json.dumps(run, default=str) + "\n")
+            self.stats["written_to_file"] += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing telemetry to {self.fallback_path}: {str(e)}")
+
+
+_queues: Dict[str, TelemetryQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_telemetry_queue(fallback_path: str) -> TelemetryQueue:
+    """Get the process-wide telemetry queue for a fallback file, creating it on first use."""
+    key = os.path.abspath(fallback_path)
+    with _queues_lock:
+        telemetry = _queues.get(key)
+        if telemetry is None:
+            telemetry = _queues[key] = TelemetryQueue(key)
+        return telemetry
+
+
+@atexit.register
+def _close_all() -> None:
+    for telemetry in list(_queues.values()):
+        telemetry.close()
@@ -32,7 +32,8 @@ def main():
         if results:
             logger.info(f"Found {len(results)} relevant chunks:")
             for i, result in enumerate(results, 1):
-                logger.info(f"\nResult {i} (Similarity: {result['similarity']:.2f}):")
+                similarity = f" (Similarity: {result['similarity']:.2f})" if 'similarity' in result else ""
+                logger.info(f"\nResult {i}{similarity}:")
                 logger.info("-" * 40)
                 logger.info(result['content'].strip())
                 logger.info("-" * 40)
@@ -19,33 +19,16 @@ def test_document_loading():
     print(f"Chroma DB Path: {loader.chroma_store.persist_directory}")
     print("-" * 80)
     
-    # Load documents
-    documents, chunks = loader.load_documents()
+    # Process new and changed files, add their chunks to Chroma and record them in the ingest manifest
+    print("\nIngesting documents into Chroma...")
+    summary = loader.ingest()
     
-    print(f"\nProcessed Documents: {len(documents)}")
-    print(f"Total Chunks: {len(chunks)}")
+    print(f"\nProcessed Files: {summary['processed_files']}")
+    print(f"Removed Files: {summary['removed_files']}")
+    print(f"Failed Files: {summary['failed_files']}")
+    print(f"Added Chunks: {summary['added_chunks']}")
     
-    if documents:
-        print("\nDocument Sources:")
-        for doc in documents:
-            print(f"- {doc.metadata.get('source', 'Unknown source')}")
-            
-    if chunks:
-        print("\nSample Chunks:")
-        for i, chunk in enumerate(chunks[:3], 1):
-            print(f"\nChunk {i}:")
-            print("-" * 40)
-            print(f"Size: {chunk.metadata.get('chunk_size')} characters")
-            print(f"Source: {chunk.metadata.get('source_document')}")
-            print(f"Section: {chunk.metadata.get('section')}")
-            print("-" * 40)
-            print(chunk.page_content[:200] + "..." if len(chunk.page_content) > 200 else chunk.page_content)
-            print("-" * 40)
-        
-        # Add chunks to Chroma
-        print("\nAdding chunks to Chroma...")
-        loader.chroma_store.add_documents(chunks)
-        
+    if loader.manifest.keys():
         # Test querying
         print("\nTesting Chroma queries...")
         test_queries = [
@@ -59,7 +42,8 @@ def test_document_loading():
             print("-" * 40)
             results = loader.chroma_store.query_documents(query)
             for i, result in enumerate(results, 1):
-                print(f"\nMatch {i} (Similarity: {result.get('similarity', 0):.2f}):")
+                similarity = f" (Similarity: {result['similarity']:.2f})" if 'similarity' in result else ""
+                print(f"\nMatch {i}{similarity}:")
                 print(result.get('content', '')[:200] + "...")
 
 if __name__ == "__main__":
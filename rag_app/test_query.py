@@ -14,20 +14,10 @@ def test_load_and_query(query_text: str = "What is this document about?"):
     doc_loader = DocumentLoader(data_dir=data_dir)
     
     try:
-        # Load documents
-        logger.info("Loading documents...")
-        documents, chunks = doc_loader.load_documents()
-        logger.info(f"Loaded {len(documents)} documents and created {len(chunks)} chunks")
-        
-        # Delete the collection and create a new one
-        doc_loader.chroma_store.client.delete_collection(name="documents")
-        doc_loader.chroma_store.collection = doc_loader.chroma_store.client.create_collection(
-            name="documents",
-            metadata={"hnsw:space": "cosine"}
-        )
-        
-        # Add documents to fresh collection
-        doc_loader.chroma_store.add_documents(chunks)
+        # Ingest new or changed documents
+        logger.info("Ingesting documents...")
+        summary = doc_loader.ingest()
+        logger.info(f"Ingestion summary: {summary}")
         
         # Get collection stats
         stats = doc_loader.chroma_store.get_collection_stats()